@@ -0,0 +1,165 @@
+"""
+Shared DuckDB helpers for the explore and export tools.
+"""
+
+import os
+import weakref
+from typing import Dict, List, Tuple
+
+import duckdb
+
+# Schemas where the downloaded tables can live: dlt writes to parliament_data,
+# while databases created by hand usually use the default main schema.
+DATA_SCHEMAS = ("parliament_data", "main")
+# Placeholders for binding DATA_SCHEMAS as query parameters
+_SCHEMA_PARAMS = ", ".join("?" for _ in DATA_SCHEMAS)
+
+# Detected data schema per open connection
+_SCHEMA_CACHE: weakref.WeakKeyDictionary[duckdb.DuckDBPyConnection, str] = (
+    weakref.WeakKeyDictionary()
+)
+# DESCRIBE results per open connection, keyed by lowercased table name
+_DESCRIBE_CACHE: weakref.WeakKeyDictionary[duckdb.DuckDBPyConnection, Dict[str, List[Tuple]]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def qident(name):
+    """
+    Quote an SQL identifier such as a schema or table name.
+
+    Names typed by the user are quoted instead of interpolated as-is, so they
+    can't inject SQL. DuckDB matches quoted identifiers case-insensitively,
+    so "SaliDBAanestys" still finds the salidbaanestys table.
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def configure_connection(conn, threads=None, memory_limit=None):
+    """
+    Apply DuckDB resource settings to a connection.
+
+    Large exports are CPU-bound on Parquet compression, so DuckDB is allowed
+    to use every core unless a thread count is given.
+
+    Args:
+        conn: DuckDB connection
+        threads: Number of DuckDB worker threads (default: all CPU cores)
+        memory_limit: DuckDB memory limit such as "8GB" (default: DuckDB's own default)
+    """
+    conn.execute("SET threads = ?", [threads or os.cpu_count() or 1])
+    if memory_limit:
+        conn.execute("SET memory_limit = ?", [memory_limit])
+
+
+def detect_schema(conn):
+    """
+    Return the schema that holds the data tables for a connection.
+
+    The schema is looked up once with a catalog query and cached for the
+    lifetime of the connection, so callers don't need to probe each schema
+    with a failing DESCRIBE.
+    """
+    schema = _SCHEMA_CACHE.get(conn)
+    if schema is None:
+        found = {
+            row[0]
+            for row in conn.execute(
+                f"""
+                SELECT DISTINCT table_schema
+                FROM information_schema.tables
+                WHERE table_schema IN ({_SCHEMA_PARAMS})
+            """,
+                list(DATA_SCHEMAS),
+            ).fetchall()
+        }
+        schema = next((s for s in DATA_SCHEMAS if s in found), DATA_SCHEMAS[-1])
+        _SCHEMA_CACHE[conn] = schema
+    return schema
+
+
+def describe_table(conn, table_name):
+    """
+    Return the columns of a data table, cached per connection.
+
+    The table is looked up in the schema found by detect_schema, with the
+    table name bound as a query parameter rather than formatted into SQL.
+    Like the schema, the result is cached for the lifetime of the connection,
+    so repeated lookups within a run don't query the catalog again.
+
+    Returns:
+        List of (column_name, data_type, is_nullable) tuples in table order
+
+    Raises:
+        duckdb.CatalogException: If the table doesn't exist
+    """
+    tables = _DESCRIBE_CACHE.setdefault(conn, {})
+    # Quoted identifiers are case-insensitive, so match names that way too
+    key = str(table_name).lower()
+    if key not in tables:
+        schema = detect_schema(conn)
+        columns = conn.execute(
+            """
+            SELECT column_name, data_type, is_nullable
+            FROM information_schema.columns
+            WHERE table_schema = ? AND lower(table_name) = ?
+            ORDER BY ordinal_position
+        """,
+            [schema, key],
+        ).fetchall()
+        if not columns:
+            raise duckdb.CatalogException(f"Table {schema}.{table_name} does not exist")
+        tables[key] = columns
+    return tables[key]
+
+
+def count_table_rows(conn, exact=True):
+    """
+    Count the rows of every data table with a single query.
+
+    Only the schema found by detect_schema is counted, the same one
+    describe_table and the export and explore tools read the tables from.
+
+    Args:
+        conn: DuckDB connection
+        exact: Run COUNT(*) on each table. If False, read the row count
+            estimates DuckDB keeps in its catalog instead, which needs no
+            table scans.
+
+    Returns:
+        List of (table_name, row_count) tuples ordered by table name
+    """
+    schema = detect_schema(conn)
+    if not exact:
+        return conn.execute(
+            """
+            SELECT table_name, estimated_size
+            FROM duckdb_tables()
+            WHERE database_name = current_database()
+              AND schema_name = ?
+            ORDER BY table_name
+        """,
+            [schema],
+        ).fetchall()
+
+    tables = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = ?
+            ORDER BY table_name
+        """,
+            [schema],
+        ).fetchall()
+    ]
+    if not tables:
+        return []
+
+    # One scalar subquery per table, so all counts come back in a single row
+    counts = ", ".join(
+        f"(SELECT COUNT(*) FROM {qident(schema)}.{qident(table)})" for table in tables
+    )
+    row = conn.execute(f"SELECT {counts}").fetchone()
+    return list(zip(tables, row))
@@ -7,40 +7,29 @@ Allows viewing table schemas, sample data, and running custom queries.
 import duckdb
 import sys
 
+from db_utils import count_table_rows, describe_table, detect_schema, qident
+
+# Number of rows shown for custom queries
+PREVIEW_ROWS = 10
+
 def explore_database(db_file="eduskunta.duckdb"):
     """
     Simple utility to explore the downloaded Eduskunta data.
     """
     try:
-        # Connect to the database
-        conn = duckdb.connect(db_file)
-        
-        # List all tables in the database
-        try:
-            tables = conn.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema='parliament_data'
-            """).fetchall()
-        except Exception:
-            # Try default schema if parliament_data schema doesn't exist
-            tables = conn.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema='main'
-            """).fetchall()
+        # Connect to the database read-only; the explorer never writes
+        conn = duckdb.connect(db_file, read_only=True)
+
+        # Look up the data schema once for the whole session
+        schema_name = detect_schema(conn)
         
-        print(f"Found {len(tables)} tables in the database:")
-        for i, (table,) in enumerate(tables, 1):
-            # Get row count for each table
-            schema_name = "parliament_data"
-            try:
-                count = conn.execute(f"SELECT COUNT(*) FROM {schema_name}.{table}").fetchone()[0]
-            except Exception:
-                schema_name = "main"
-                count = conn.execute(f"SELECT COUNT(*) FROM {schema_name}.{table}").fetchone()[0]
-            
-            print(f"{i}. {table} ({count} rows)")
+        # List all tables in the database with their estimated row counts,
+        # read from the catalog without scanning every table
+        table_counts = count_table_rows(conn, exact=False)
+
+        print(f"Found {len(table_counts)} tables in the database:")
+        for i, (table, count) in enumerate(table_counts, 1):
+            print(f"{i}. {table} (~{count} rows)")
         
         # Interactive exploration if run directly
         if __name__ == "__main__":
@@ -56,13 +45,7 @@ def explore_database(db_file="eduskunta.duckdb"):
                 if choice == "1":
                     table_name = input("Enter table name: ")
                     try:
-                        # Try with parliament_data schema first
-                        try:
-                            schema = conn.execute(f"DESCRIBE parliament_data.{table_name}").fetchall()
-                            schema_name = "parliament_data"
-                        except Exception:
-                            schema = conn.execute(f"DESCRIBE main.{table_name}").fetchall()
-                            schema_name = "main"
+                        schema = describe_table(conn, table_name)
                         
                         print(f"\nSchema for {table_name} in {schema_name} schema:")
                         for col in schema:
@@ -74,36 +57,36 @@ def explore_database(db_file="eduskunta.duckdb"):
                     table_name = input("Enter table name: ")
                     limit = input("Number of rows to show (default 5): ") or "5"
                     try:
-                        # Try with parliament_data schema first
-                        try:
-                            rows = conn.execute(f"SELECT * FROM parliament_data.{table_name} LIMIT {limit}").fetchall()
-                            schema_name = "parliament_data"
-                        except Exception:
-                            rows = conn.execute(f"SELECT * FROM main.{table_name} LIMIT {limit}").fetchall()
-                            schema_name = "main"
+                        limit = int(limit)
+                        rows = conn.sql(
+                            f"SELECT * FROM {qident(schema_name)}.{qident(table_name)}"
+                        ).limit(limit)
                         
-                        headers = [col[0] for col in conn.description]
+                        # DuckDB renders the table itself, no Python-side formatting
                         print(f"\nSample data from {schema_name}.{table_name}:")
-                        print(" | ".join(headers))
-                        print("-" * 80)
-                        for row in rows:
-                            print(" | ".join(str(val) for val in row))
+                        rows.show(max_rows=limit)
                     except Exception as e:
                         print(f"Error: {e}")
                 
                 elif choice == "3":
                     query = input("Enter SQL query: ")
                     try:
-                        result = conn.execute(query).fetchall()
-                        headers = [col[0] for col in conn.description]
-                        print("\nResults:")
-                        print(" | ".join(headers))
-                        print("-" * 80)
-                        for row in result[:10]:  # Limit to 10 rows
-                            print(" | ".join(str(val) for val in row))
-                        
-                        if len(result) > 10:
-                            print(f"... and {len(result) - 10} more rows")
+                        result = conn.sql(query)
+                        if result is None:
+                            # Statements like SET or PRAGMA don't return rows
+                            print("\nQuery executed")
+                        else:
+                            # Push the limit into the query so DuckDB stops after
+                            # PREVIEW_ROWS rows instead of producing the whole result
+                            print("\nResults:")
+                            result.limit(PREVIEW_ROWS).show(max_rows=PREVIEW_ROWS)
+
+                            if result.limit(1, offset=PREVIEW_ROWS).fetchone() is not None:
+                                print(f"... more rows (showing the first {PREVIEW_ROWS})")
+                                answer = input("Count all rows? (y/N): ")
+                                if answer.strip().lower() == "y":
+                                    total = result.aggregate("COUNT(*)").fetchone()[0]
+                                    print(f"Total rows: {total}")
                     except Exception as e:
                         print(f"Error: {e}")
                 
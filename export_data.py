@@ -4,52 +4,70 @@ Export tool for Eduskunta data.
 Allows exporting tables from the DuckDB database to CSV, Excel, JSON, or Parquet formats.
 """
 
-import os
-import sys
 import argparse
+import datetime
+from decimal import Decimal
 import duckdb
+import orjson
 import pandas as pd
-import json
 import pyarrow as pa
+import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
+import xlsxwriter
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from db_utils import configure_connection, count_table_rows, describe_table, detect_schema, qident
+
+# Rows per Parquet row group. Larger groups than DuckDB's default 122,880
+# compress better with zstd and carry less per-group metadata.
+PARQUET_ROW_GROUP_SIZE = 500_000
+# Rows per Arrow batch when streaming query results to Parquet. PyArrow
+# writes each batch as its own row group, so batches match the group size.
+PARQUET_BATCH_SIZE = PARQUET_ROW_GROUP_SIZE
+# Rows per Arrow batch when writing CSV with PyArrow
+CSV_BATCH_SIZE = 65536
+# Rows per Arrow batch when writing JSON with orjson
+JSON_BATCH_SIZE = 65536
+# Target size of a Parquet data page when writing with PyArrow
+PARQUET_DATA_PAGE_SIZE = 1 << 20
+# Default zstd compression level for Parquet files
+DEFAULT_ZSTD_LEVEL = 3
+# Rows per Excel workbook; larger exports are split into numbered files
+EXCEL_SEGMENT_ROWS = 250_000
+# Data rows that fit on one Excel worksheet (1,048,576 rows minus the header)
+EXCEL_MAX_ROWS = 1_048_575
+# Output formats accepted by --format
+EXPORT_FORMATS = ("csv", "excel", "json", "parquet")
+# Default number of tables exported in parallel with --all
+DEFAULT_EXPORT_WORKERS = 4
 
 
 def list_tables(conn):
     """List all available tables in the database."""
-    try:
-        tables = conn.execute(
-            """
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema='parliament_data'
-        """
-        ).fetchall()
-    except Exception:
-        # Try default schema if parliament_data schema doesn't exist
-        tables = conn.execute(
-            """
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema='main'
+    # detect_schema is cached per connection, so this is a single catalog query
+    tables = conn.execute(
         """
-        ).fetchall()
+        SELECT table_name
+        FROM information_schema.tables
+        WHERE table_schema = ?
+        ORDER BY table_name
+    """,
+        [detect_schema(conn)],
+    ).fetchall()
 
     return [t[0] for t in tables]
 
 
 def get_schema_for_table(conn, table_name):
     """Get the schema for a table."""
+    schema_name = detect_schema(conn)
     try:
-        schema = conn.execute(f"DESCRIBE parliament_data.{table_name}").fetchall()
-        return "parliament_data", schema
-    except Exception:
-        try:
-            schema = conn.execute(f"DESCRIBE main.{table_name}").fetchall()
-            return "main", schema
-        except Exception as e:
-            print(f"Error: {e}")
-            return None, None
+        schema = describe_table(conn, table_name)
+        return schema_name, schema
+    except Exception as e:
+        print(f"Error: {e}")
+        return None, None
 
 
 def get_query_df(conn, query):
@@ -62,111 +80,561 @@ def get_query_df(conn, query):
         return None
 
 
-def export_to_csv(df, output_path):
-    """Export a DataFrame to CSV."""
+def get_query_arrow(conn, query):
+    """Execute a query and return the results as a PyArrow Table."""
+    try:
+        result = conn.execute(query)
+        # DuckDB 1.4+ renamed fetch_arrow_table to to_arrow_table
+        if hasattr(result, "to_arrow_table"):
+            return result.to_arrow_table()
+        return result.fetch_arrow_table()
+    except Exception as e:
+        print(f"Error executing query: {e}")
+        return None
+
+
+def get_query_batches(conn, query, batch_size=PARQUET_BATCH_SIZE):
+    """Execute a query and return a PyArrow RecordBatchReader over the results."""
+    try:
+        result = conn.execute(query)
+        # DuckDB 1.4+ renamed fetch_record_batch to to_arrow_reader
+        if hasattr(result, "to_arrow_reader"):
+            return result.to_arrow_reader(batch_size)
+        return result.fetch_record_batch(batch_size)
+    except Exception as e:
+        print(f"Error executing query: {e}")
+        return None
+
+
+def strip_timezones(batch):
+    """
+    Return a RecordBatch with timezone-aware timestamp columns as naive UTC.
+
+    Arrow stores timestamps as UTC whatever their timezone, so the cast only
+    drops the timezone from the type without touching the values.
+    """
+    fields = [
+        (
+            pa.field(field.name, pa.timestamp(field.type.unit), field.nullable)
+            if pa.types.is_timestamp(field.type) and field.type.tz
+            else field
+        )
+        for field in batch.schema
+    ]
+    if fields == list(batch.schema):
+        return batch
+    columns = [column.cast(field.type) for column, field in zip(batch.columns, fields)]
+    return pa.RecordBatch.from_arrays(columns, schema=pa.schema(fields))
+
+
+def write_parquet_batches(reader, output_path, compression, compression_level=None):
+    """
+    Write a RecordBatchReader to Parquet one batch at a time.
+
+    Only one batch is held in memory, so tables larger than RAM can be written.
+    Each batch becomes a row group of at most PARQUET_ROW_GROUP_SIZE rows.
+    Dictionary encoding is kept on since the downloaded tables have many
+    repeated string values, and 1 MiB data pages keep page headers cheap.
+
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    with pq.ParquetWriter(
+        output_path,
+        reader.schema,
+        compression=compression,
+        compression_level=compression_level,
+        use_dictionary=True,
+        write_statistics=True,
+        data_page_size=PARQUET_DATA_PAGE_SIZE,
+        version="2.6",
+        # Store microseconds like DuckDB does, even for nanosecond columns
+        coerce_timestamps="us",
+        allow_truncated_timestamps=True,
+    ) as writer:
+        for batch in reader:
+            writer.write_batch(batch, row_group_size=PARQUET_ROW_GROUP_SIZE)
+            rows += batch.num_rows
+    return rows
+
+
+def write_csv_batches(reader, output_path):
+    """
+    Write a RecordBatchReader to CSV one batch at a time.
+
+    The header is written once, and only one batch is held in memory.
+
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    with pacsv.CSVWriter(output_path, reader.schema) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+# orjson leaves datetime, date and time values to _json_default
+JSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _duckdb_time(value):
+    """Format a time of day like DuckDB: HH:MM:SS, with a fraction only if there is one."""
+    text = f"{value.hour:02d}:{value.minute:02d}:{value.second:02d}"
+    if value.microsecond:
+        text += f".{value.microsecond:06d}".rstrip("0")
+    return text
+
+
+def _duckdb_datetime(value):
+    """
+    Format a timestamp like DuckDB's JSON writer, e.g. "2023-01-01 12:00:00+00".
+
+    The date and time are separated by a space, and the UTC offset of a
+    timestamp with a time zone is written as +HH, or +HH:MM if it has minutes.
+    """
+    text = f"{value.date().isoformat()} {_duckdb_time(value)}"
+    offset = value.utcoffset()
+    if offset is not None:
+        sign = "-" if offset < datetime.timedelta(0) else "+"
+        minutes = abs(offset) // datetime.timedelta(minutes=1)
+        hours, minutes = divmod(minutes, 60)
+        text += f"{sign}{hours:02d}" + (f":{minutes:02d}" if minutes else "")
+    return text
+
+
+def _json_default(value):
+    """Serialize values orjson doesn't support the way DuckDB's JSON writer does."""
+    # datetime is a subclass of date, so it has to be checked first
+    if isinstance(value, datetime.datetime):
+        return _duckdb_datetime(value)
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, datetime.time):
+        return _duckdb_time(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def write_json_batches(reader, output_path, lines=False):
+    """
+    Write a RecordBatchReader to JSON one batch at a time.
+
+    Each record is serialized with orjson on its own line, the same layout
+    and date and time formats DuckDB's JSON writer uses, so the whole result
+    is never held in memory.
+
+    Args:
+        reader: RecordBatchReader over the rows to write
+        output_path: Path of the file to write
+        lines: Write newline-delimited JSON instead of a JSON array
+
+    Returns:
+        Number of rows written
+    """
+    rows = 0
+    with open(output_path, "wb") as f:
+        if lines:
+            for batch in reader:
+                records = batch.to_pylist()
+                f.write(
+                    b"".join(
+                        orjson.dumps(r, default=_json_default, option=JSON_OPTIONS) + b"\n"
+                        for r in records
+                    )
+                )
+                rows += len(records)
+            return rows
+
+        # DuckDB indents the records of a JSON array with a tab
+        f.write(b"[\n\t")
+        for batch in reader:
+            records = batch.to_pylist()
+            if not records:
+                continue
+            # One write per batch
+            if rows:
+                f.write(b",\n\t")
+            f.write(
+                b",\n\t".join(
+                    orjson.dumps(r, default=_json_default, option=JSON_OPTIONS) for r in records
+                )
+            )
+            rows += len(records)
+        f.write(b"\n]\n")
+    return rows
+
+
+def copy_query_to_file(conn, query, output_path, options):
+    """
+    Stream the results of a query straight to a file with DuckDB's COPY ... TO.
+
+    The rows never leave DuckDB, so no pandas DataFrame or Arrow table is built.
+
+    Args:
+        conn: DuckDB connection
+        query: SQL query whose results are written
+        output_path: Path of the file to write
+        options: COPY options, e.g. "FORMAT PARQUET, COMPRESSION 'zstd'"
+
+    Returns:
+        Number of rows written
+    """
+    path = str(output_path).replace("'", "''")
+    result = conn.execute(f"COPY ({query}) TO '{path}' ({options})").fetchone()
+    return result[0] if result else 0
+
+
+def export_to_csv(conn, query, output_path):
+    """
+    Export query results to CSV.
+
+    Uses DuckDB's native CSV writer and falls back to PyArrow if COPY fails.
+
+    Returns:
+        Number of rows exported, or None if the export failed
+    """
     try:
-        df.to_csv(output_path, index=False)
+        rows = copy_query_to_file(conn, query, output_path, "FORMAT CSV, HEADER, DELIMITER ','")
         print(f"Data exported to CSV: {output_path}")
-        return True
+        return rows
+    except Exception as e:
+        print(f"Error exporting to CSV with DuckDB: {e}")
+
+    reader = get_query_batches(conn, query, CSV_BATCH_SIZE)
+    if reader is None:
+        return None
+
+    try:
+        print("Trying PyArrow export instead...")
+        rows = write_csv_batches(reader, output_path)
+        print(f"Data exported to CSV: {output_path}")
+        return rows
     except Exception as e:
         print(f"Error exporting to CSV: {e}")
-        return False
+        return None
+
+
+def _write_missing_as_blank(worksheet, row, col, value, cell_format=None):
+    """xlsxwriter write handler that writes NaN, NaT and NA as empty cells."""
+    if pd.isna(value):
+        return worksheet.write_blank(row, col, None, cell_format)
+    # Returning None lets xlsxwriter write the value as usual
+    return None
+
+
+def _to_naive_utc(value):
+    """Convert a timezone-aware timestamp to naive UTC, leaving other values alone."""
+    if isinstance(value, pd.Timestamp) and value.tzinfo is not None:
+        return value.tz_convert("UTC").tz_localize(None)
+    return value
+
+
+def write_excel(df, output_path):
+    """
+    Write a DataFrame to an Excel file with xlsxwriter's constant_memory mode.
+
+    constant_memory flushes each row to disk as soon as the next one starts,
+    so memory use stays flat regardless of the row count. pandas' to_excel
+    writes cells column by column, which that mode can't handle, so the rows
+    are written here one at a time instead.
+    """
+    workbook = xlsxwriter.Workbook(
+        str(output_path),
+        {
+            "constant_memory": True,
+            # Large segments can go over the 4 GB limit of a plain zip file
+            "use_zip64": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+            "remove_timezone": True,
+        },
+    )
+    try:
+        worksheet = workbook.add_worksheet()
+        for missing_type in (float, type(pd.NaT), type(pd.NA)):
+            worksheet.add_write_handler(missing_type, _write_missing_as_blank)
+
+        worksheet.write_row(0, 0, [str(col) for col in df.columns])
+        for row_num, row in enumerate(df.itertuples(index=False, name=None), 1):
+            worksheet.write_row(row_num, 0, row)
+    finally:
+        workbook.close()
 
 
 def export_to_excel(df, output_path):
     """Export a DataFrame to Excel.
-    
-    GUARANTEED SOLUTION: Convert dates to ISO-formatted strings manually.
-    This approach is 100% reliable for Excel compatibility.
+
+    Values keep their types, so numbers and dates stay numbers and dates in
+    the workbook. Excel can't store timezones, so timezone-aware columns are
+    converted to naive UTC in place instead of copying the whole DataFrame;
+    pass a frame you no longer need. If writing the typed values fails, the
+    data is written as strings instead.
     """
+    # Fail before writing anything if the rows don't fit on one worksheet
+    if len(df) > EXCEL_MAX_ROWS:
+        print(
+            f"Error during Excel export: {len(df):,} rows is more than the "
+            f"{EXCEL_MAX_ROWS:,} rows an Excel worksheet can hold"
+        )
+        return False
+
     try:
-        # First attempt: Direct string export
-        # Convert ENTIRE dataframe to strings first (simplest and most reliable approach)
-        df_str = df.astype(str)
-        df_str.to_excel(output_path, index=False)
+        # Excel can't store timezones: convert timezone-aware columns to naive UTC
+        for col in df.select_dtypes(include=["datetimetz"]).columns:
+            df[col] = df[col].dt.tz_convert("UTC").dt.tz_localize(None)
+        # Mixed-type object columns can still hold timezone-aware values. Only
+        # those need the per-value conversion; infer_dtype skips e.g. plain
+        # string columns with a single C-level scan.
+        for col in df.columns:
+            if df[col].dtype != object:
+                continue
+            if pd.api.types.infer_dtype(df[col], skipna=True) in ("datetime", "mixed"):
+                df[col] = df[col].map(_to_naive_utc)
+
+        write_excel(df, output_path)
         print(f"Data exported to Excel: {output_path}")
-        print("Note: All data converted to string format for maximum Excel compatibility.")
+        print("Note: Timezone-aware dates converted to UTC for Excel compatibility.")
         return True
     except Exception as e:
         print(f"Error during Excel export: {e}")
-        
-        # Fallback method: More complex approach with datetime handling
+
+        # Fallback method: write every value as a string
         try:
             print("Trying fallback method...")
-            # Create a fresh copy
-            df_excel = df.copy()
-            
-            # For each datetime column, convert to string in ISO format without timezone
-            for col in df.select_dtypes(include=['datetime64']).columns:
-                # Format dates as strings like: "2023-04-15 14:30:00"
-                df_excel[col] = pd.Series([
-                    d.strftime('%Y-%m-%d %H:%M:%S') if pd.notna(d) else ''
-                    for d in df[col]
-                ])
-            
-            # Save with explicit column types
-            df_excel.to_excel(output_path, index=False)
+            write_excel(df.astype(str), output_path)
             print(f"Data exported to Excel: {output_path}")
-            print("Note: Dates converted to formatted strings for Excel compatibility.")
+            print("Note: All data converted to string format for maximum Excel compatibility.")
             return True
         except Exception as e2:
             print(f"All Excel export methods failed: {e2}")
             return False
 
 
-def export_to_json(df, output_path, orient="records"):
-    """Export a DataFrame to JSON."""
-    try:
-        # Convert DataFrame to JSON
-        json_data = df.to_json(orient=orient)
+def segment_path(output_dir, base_filename, extension, index, numbered):
+    """Return the path of a segment file: base_index.ext, or base.ext if not numbered."""
+    if numbered:
+        return Path(output_dir) / f"{base_filename}_{index}.{extension}"
+    return Path(output_dir) / f"{base_filename}.{extension}"
+
+
+def export_segments(conn, query, output_dir, base_filename, extension, segment_size, write_segment):
+    """
+    Export query results to numbered files of at most segment_size rows.
+
+    The results are fetched as Arrow batches of segment_size rows, so at most
+    two segments (the one being written and the next) are held in memory.
+    Files are named base_0.ext, base_1.ext, ...; a result that fits in a
+    single segment is written to plain base.ext.
+
+    Args:
+        conn: DuckDB connection
+        query: SQL query whose results are exported
+        output_dir: Directory to save the files in
+        base_filename: File name without the segment number and extension
+        extension: File extension, e.g. "xlsx"
+        segment_size: Maximum number of rows per file
+        write_segment: Function called as write_segment(batch, path) that
+            returns False if writing the file failed
+
+    Returns:
+        Tuple of (rows exported, list of file paths), or (None, paths) if the
+        export failed
+    """
+    reader = get_query_batches(conn, query, segment_size)
+    if reader is None:
+        return None, []
+
+    rows = 0
+    paths = []
+    batches = iter(reader)
+    batch = next(batches, None)
+    while batch is not None:
+        # Look one batch ahead to know whether the result needs numbered files
+        next_batch = next(batches, None)
+        numbered = bool(paths) or next_batch is not None
+        path = segment_path(output_dir, base_filename, extension, len(paths), numbered)
+        paths.append(path)
+        if write_segment(batch, path) is False:
+            return None, paths
+        rows += batch.num_rows
+        batch = next_batch
+
+    if len(paths) > 1:
+        print(f"Exported {rows:,} rows in {len(paths)} files of up to {segment_size:,} rows")
+
+    return rows, paths
+
+
+def export_query_segments(
+    conn, query, output_dir, base_filename, extension, segment_size, export_file
+):
+    """
+    Export query results to numbered files of at most segment_size rows with COPY.
+
+    Each segment is exported on its own with LIMIT/OFFSET over the query, by
+    the same export function that writes unsegmented files. The segments are
+    therefore formatted exactly like an unsegmented export, e.g. CSV and JSON
+    timestamps as DuckDB writes them. File names follow export_segments.
+
+    Args:
+        conn: DuckDB connection
+        query: SQL query whose results are exported
+        output_dir: Directory to save the files in
+        base_filename: File name without the segment number and extension
+        extension: File extension, e.g. "csv"
+        segment_size: Maximum number of rows per file
+        export_file: Function called as export_file(conn, query, path) that
+            returns the number of rows written, or None if the export failed
+
+    Returns:
+        Tuple of (rows exported, list of file paths), or (None, paths) if the
+        export failed
+    """
+    total = conn.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+    if total == 0:
+        return 0, []
+
+    segments = (total + segment_size - 1) // segment_size
+    rows = 0
+    paths = []
+    for index in range(segments):
+        path = segment_path(output_dir, base_filename, extension, index, segments > 1)
+        paths.append(path)
+        segment_query = (
+            f"SELECT * FROM ({query}) LIMIT {segment_size} OFFSET {index * segment_size}"
+        )
+        segment_rows = export_file(conn, segment_query, path)
+        if segment_rows is None:
+            return None, paths
+        rows += segment_rows
+
+    if len(paths) > 1:
+        print(f"Exported {rows:,} rows in {len(paths)} files of up to {segment_size:,} rows")
+
+    return rows, paths
+
+
+def export_to_json(conn, query, output_path, orient="records", lines=False):
+    """
+    Export query results to JSON.
+
+    Record-oriented output is written as a JSON array by DuckDB's native
+    JSON writer, falling back to streaming the records with orjson if COPY
+    fails. Other orientations use pandas.
 
-        # Pretty-print JSON with indentation
-        parsed_data = json.loads(json_data)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(parsed_data, f, ensure_ascii=False, indent=2)
+    With lines=True the records are written as newline-delimited JSON (one
+    object per line), which readers can also process one record at a time.
+
+    Returns:
+        Number of rows exported, or None if the export failed
+    """
+    if orient == "records" or lines:
+        try:
+            options = "FORMAT JSON" if lines else "FORMAT JSON, ARRAY true"
+            rows = copy_query_to_file(conn, query, output_path, options)
+            print(f"Data exported to JSON: {output_path}")
+            return rows
+        except Exception as e:
+            print(f"Error exporting to JSON with DuckDB: {e}")
+
+        reader = get_query_batches(conn, query, JSON_BATCH_SIZE)
+        if reader is None:
+            return None
+
+        try:
+            print("Trying orjson export instead...")
+            rows = write_json_batches(reader, output_path, lines=lines)
+            print(f"Data exported to JSON: {output_path}")
+            return rows
+        except Exception as e:
+            print(f"Error exporting to JSON: {e}")
+            return None
+
+    df = get_query_df(conn, query)
+    if df is None:
+        return None
+
+    try:
+        # pandas writes indented JSON itself, no re-parse needed
+        df.to_json(output_path, orient=orient, force_ascii=False, indent=2)
 
         print(f"Data exported to JSON: {output_path}")
-        return True
+        return len(df)
     except Exception as e:
         print(f"Error exporting to JSON: {e}")
-        return False
+        return None
 
 
-def export_to_parquet(df, output_path, compression="snappy"):
+def export_to_parquet(
+    conn, query, output_path, compression="zstd", compression_level=DEFAULT_ZSTD_LEVEL
+):
     """
-    Export a DataFrame to Parquet format.
+    Export query results to Parquet format.
+
+    Uses DuckDB's native Parquet writer so the data is streamed from DuckDB
+    directly to disk. Falls back to PyArrow if COPY fails.
 
     Args:
-        df: Pandas DataFrame to export
+        conn: DuckDB connection
+        query: SQL query whose results are exported
         output_path: Path to save the Parquet file
-        compression: Compression algorithm (snappy, gzip, brotli, zstd, or None)
+        compression: Compression algorithm (zstd, snappy, gzip, brotli, or None)
+        compression_level: zstd compression level (ignored for other codecs)
+
+    Returns:
+        Number of rows exported, or None if the export failed
     """
+    # Only zstd takes a compression level
+    level = (
+        int(compression_level) if compression == "zstd" and compression_level is not None else None
+    )
+
     try:
-        # Convert pandas DataFrame to PyArrow Table
-        table = pa.Table.from_pandas(df)
+        codec = compression or "uncompressed"
+        options = f"FORMAT PARQUET, COMPRESSION '{codec}', ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE}"
+        if level is not None:
+            options += f", COMPRESSION_LEVEL {level}"
+        rows = copy_query_to_file(conn, query, output_path, options)
+        print(f"Data exported to Parquet: {output_path}")
+        print(f"Compression: {compression}")
+        return rows
+    except Exception as e:
+        print(f"Error exporting to Parquet with DuckDB: {e}")
 
-        # Write to Parquet with specified compression
-        pq.write_table(table, output_path, compression=compression)
+    reader = get_query_batches(conn, query)
+    if reader is None:
+        return None
+
+    try:
+        print("Trying PyArrow export instead...")
+        # Stream the Arrow batches to Parquet with specified compression
+        rows = write_parquet_batches(reader, output_path, compression, level)
 
         print(f"Data exported to Parquet: {output_path}")
         print(f"Compression: {compression}")
-        return True
+        return rows
     except Exception as e:
         print(f"Error exporting to Parquet: {e}")
 
         # Try with different compression if the first one fails
         if compression != "snappy" and compression is not None:
             try:
-                print(f"Trying with snappy compression instead...")
-                table = pa.Table.from_pandas(df)
-                pq.write_table(table, output_path, compression="snappy")
+                print("Trying with snappy compression instead...")
+                # The first reader may be partially consumed, so run the query again
+                reader = get_query_batches(conn, query)
+                rows = write_parquet_batches(reader, output_path, "snappy")
                 print(f"Data exported to Parquet: {output_path}")
-                print(f"Compression: snappy (fallback)")
-                return True
+                print("Compression: snappy (fallback)")
+                return rows
             except Exception as e2:
                 print(f"Alternative compression also failed: {e2}")
 
-        return False
+        return None
 
 
 def export_data(
@@ -177,7 +645,13 @@ def export_data(
     query=None,
     limit=None,
     where=None,
-    compression="snappy",
+    compression="zstd",
+    conn=None,
+    exact_counts=False,
+    compression_level=DEFAULT_ZSTD_LEVEL,
+    json_lines=False,
+    segment_size=None,
+    columns=None,
 ):
     """
     Export data from DuckDB to specified format.
@@ -185,33 +659,44 @@ def export_data(
     Args:
         db_file: Path to DuckDB database file
         table_name: Table to export (ignored if query is provided)
-        output_format: csv, excel, or json
+        output_format: csv, excel, json, or parquet
         output_dir: Directory to save exported files
         query: Custom SQL query to export (overrides table_name)
         limit: Maximum number of rows to export
         where: WHERE clause to filter data (ignored if query is provided)
+        compression: Compression for Parquet files
+        conn: Open DuckDB connection to reuse (a new one is opened and closed if None)
+        exact_counts: When listing tables, count rows exactly instead of using estimates
+        compression_level: zstd compression level for Parquet files
+        json_lines: Write JSON as newline-delimited records (.jsonl)
+        segment_size: Split CSV, JSON and Excel output into numbered files of
+            at most this many rows. Excel is always split, by default every
+            EXCEL_SEGMENT_ROWS rows, to stay under Excel's row limit.
+        columns: Columns to export instead of all of them (ignored if query is provided)
+
+    Returns:
+        True if the export (or table listing) succeeded, False otherwise
     """
+    close_conn = conn is None
     try:
-        # Connect to the database
-        conn = duckdb.connect(db_file)
+        # Connect to the database unless the caller already did
+        if conn is None:
+            conn = duckdb.connect(db_file, read_only=True)
+            configure_connection(conn)
 
         # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
+        out_dir = Path(output_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
 
         # If no table name and no query, list tables and exit
         if table_name is None and query is None:
-            tables = list_tables(conn)
-            print(f"Available tables ({len(tables)}):")
-            for i, table in enumerate(tables, 1):
-                try:
-                    schema_name, _ = get_schema_for_table(conn, table)
-                    count = conn.execute(f"SELECT COUNT(*) FROM {schema_name}.{table}").fetchone()[
-                        0
-                    ]
-                    print(f"{i}. {table} ({count:,} rows)")
-                except Exception:
-                    print(f"{i}. {table} (error getting row count)")
-            return
+            table_counts = count_table_rows(conn, exact=exact_counts)
+            # Catalog estimates are marked with ~
+            approx = "" if exact_counts else "~"
+            print(f"Available tables ({len(table_counts)}):")
+            for i, (table, count) in enumerate(table_counts, 1):
+                print(f"{i}. {table} ({approx}{count:,} rows)")
+            return True
 
         # Prepare query
         if query is None:
@@ -219,22 +704,26 @@ def export_data(
             schema_name, schema = get_schema_for_table(conn, table_name)
             if schema is None:
                 print(f"Table '{table_name}' not found in database")
-                return
+                return False
+
+            # Select only the requested columns, so DuckDB doesn't read the others
+            select_list = "*"
+            if columns:
+                table_columns = {row[0].lower() for row in schema}
+                unknown = [c for c in columns if c.lower() not in table_columns]
+                if unknown:
+                    print(f"Unknown columns in table '{table_name}': {', '.join(unknown)}")
+                    return False
+                select_list = ", ".join(qident(c) for c in columns)
 
             # Build query based on table name
-            query = f"SELECT * FROM {schema_name}.{table_name}"
+            query = f"SELECT {select_list} FROM {qident(schema_name)}.{qident(table_name)}"
 
             if where:
                 query += f" WHERE {where}"
 
             if limit:
-                query += f" LIMIT {limit}"
-
-        # Execute query and get DataFrame
-        df = get_query_df(conn, query)
-        if df is None or len(df) == 0:
-            print("No data returned from query or table")
-            return
+                query += f" LIMIT {int(limit)}"
 
         # Determine output filename
         if table_name:
@@ -242,38 +731,187 @@ def export_data(
         else:
             base_filename = "custom_query"
 
-        # Export based on format
-        if output_format.lower() == "csv":
-            output_path = os.path.join(output_dir, f"{base_filename}.csv")
-            export_to_csv(df, output_path)
+        output_format = output_format.lower()
+        extension = {"csv": "csv", "excel": "xlsx", "parquet": "parquet"}.get(
+            output_format, "jsonl" if json_lines else "json"
+        )
+        output_paths = [out_dir / f"{base_filename}.{extension}"]
+
+        if output_format == "excel":
+            # Write one file per segment from Arrow batches
+            def write_segment(batch, path):
+                # Timezones are stripped in Arrow, before pandas sees the data.
+                # split_blocks keeps one block per column, so numeric columns
+                # without nulls are shared with Arrow instead of copied.
+                df = strip_timezones(batch).to_pandas(split_blocks=True)
+                return export_to_excel(df, path)
+
+            size = min(segment_size or EXCEL_SEGMENT_ROWS, EXCEL_MAX_ROWS)
+            rows, output_paths = export_segments(
+                conn, query, out_dir, base_filename, extension, int(size), write_segment
+            )
+
+        elif segment_size and output_format in ("csv", "json"):
+            # Each segment goes through the same COPY export as a single file
+            if output_format == "csv":
+                export_file = export_to_csv
+            else:
 
-        elif output_format.lower() == "excel":
-            output_path = os.path.join(output_dir, f"{base_filename}.xlsx")
-            export_to_excel(df, output_path)
+                def export_file(conn, query, path):
+                    return export_to_json(conn, query, path, lines=json_lines)
 
-        elif output_format.lower() == "json":
-            output_path = os.path.join(output_dir, f"{base_filename}.json")
-            export_to_json(df, output_path)
+            rows, output_paths = export_query_segments(
+                conn, query, out_dir, base_filename, extension, int(segment_size), export_file
+            )
 
-        elif output_format.lower() == "parquet":
-            output_path = os.path.join(output_dir, f"{base_filename}.parquet")
+        elif output_format == "csv":
+            # CSV, JSON and Parquet are written by DuckDB directly, without a DataFrame
+            rows = export_to_csv(conn, query, output_paths[0])
+
+        elif output_format == "json":
+            rows = export_to_json(conn, query, output_paths[0], lines=json_lines)
+
+        elif output_format == "parquet":
             # Handle "none" as None for compression
             comp = None if compression.lower() == "none" else compression.lower()
-            export_to_parquet(df, output_path, compression=comp)
+            rows = export_to_parquet(
+                conn, query, output_paths[0], compression=comp, compression_level=compression_level
+            )
 
         else:
             print(f"Unsupported output format: {output_format}")
-            return
+            return False
+
+        if rows is None:
+            return False
+        if rows == 0:
+            print("No data returned from query or table")
+            return False
+        column_count = len(conn.execute(f"SELECT * FROM ({query}) LIMIT 0").description)
 
         # Print summary
-        print(f"\nExport summary:")
-        print(f"- Rows exported: {len(df):,}")
-        print(f"- Columns: {len(df.columns)}")
+        print("\nExport summary:")
+        print(f"- Rows exported: {rows:,}")
+        print(f"- Columns: {column_count}")
         print(f"- Format: {output_format}")
-        print(f"- File size: {os.path.getsize(output_path):,} bytes")
+        if len(output_paths) > 1:
+            print(f"- Files: {len(output_paths)}")
+        print(f"- File size: {sum(path.stat().st_size for path in output_paths):,} bytes")
+        return True
 
     except Exception as e:
         print(f"Error: {e}")
+        return False
+    finally:
+        if close_conn and conn is not None:
+            conn.close()
+
+
+def parse_formats(value):
+    """
+    Parse a comma-separated list of output formats, e.g. "csv,parquet".
+
+    Raises:
+        argparse.ArgumentTypeError: If a format is not supported
+    """
+    formats = []
+    for output_format in value.split(","):
+        output_format = output_format.strip().lower()
+        if output_format not in EXPORT_FORMATS:
+            raise argparse.ArgumentTypeError(
+                f"invalid format '{output_format}' (choose from {', '.join(EXPORT_FORMATS)})"
+            )
+        if output_format not in formats:
+            formats.append(output_format)
+    return formats
+
+
+def export_formats(db_file, conn, output_formats, **export_args):
+    """
+    Export the same table or query to several formats in parallel.
+
+    Each format is written by its own thread through its own cursor on the
+    shared connection, so DuckDB runs the writers concurrently.
+
+    Args:
+        db_file: Path to DuckDB database file
+        conn: Open DuckDB connection
+        output_formats: List of output formats
+        **export_args: Other arguments passed to export_data
+
+    Returns:
+        Number of formats exported successfully
+    """
+
+    def export_format(output_format):
+        cursor = conn.cursor()
+        try:
+            return export_data(db_file, output_format=output_format, conn=cursor, **export_args)
+        finally:
+            cursor.close()
+
+    with ThreadPoolExecutor(max_workers=len(output_formats)) as executor:
+        results = list(executor.map(export_format, output_formats))
+
+    return sum(1 for result in results if result)
+
+
+def export_all_tables(
+    db_file,
+    conn,
+    output_format="csv",
+    output_dir=".",
+    limit=None,
+    compression="zstd",
+    max_workers=DEFAULT_EXPORT_WORKERS,
+    compression_level=DEFAULT_ZSTD_LEVEL,
+    json_lines=False,
+    segment_size=None,
+):
+    """
+    Export every data table in the database, several tables at a time.
+
+    Each worker exports through its own cursor on the shared connection, so
+    DuckDB runs the exports concurrently instead of queueing them on one
+    connection. Internal dlt tables are skipped. output_format can also be a
+    list of formats, in which case every table is exported to each of them.
+
+    Returns:
+        Number of tables exported successfully to every format
+    """
+    tables = [t for t in list_tables(conn) if not t.startswith("_dlt")]
+    output_formats = [output_format] if isinstance(output_format, str) else list(output_format)
+
+    def export_table(task):
+        table, table_format = task
+        cursor = conn.cursor()
+        try:
+            return export_data(
+                db_file,
+                table_name=table,
+                output_format=table_format,
+                output_dir=output_dir,
+                limit=limit,
+                compression=compression,
+                compression_level=compression_level,
+                json_lines=json_lines,
+                segment_size=segment_size,
+                conn=cursor,
+            )
+        finally:
+            cursor.close()
+
+    tasks = [(table, table_format) for table in tables for table_format in output_formats]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(export_table, tasks))
+
+    # A table counts as exported when every format succeeded
+    per_format = len(output_formats)
+    exported = sum(
+        1 for i in range(len(tables)) if all(results[i * per_format : (i + 1) * per_format])
+    )
+    print(f"\nExported {exported} of {len(tables)} tables to {output_dir}")
+    return exported
 
 
 def main():
@@ -290,11 +928,32 @@ def main():
 
     parser.add_argument("--list", action="store_true", help="List available tables and exit")
 
+    parser.add_argument(
+        "--exact-counts",
+        action="store_true",
+        help="With --list, count rows exactly instead of using DuckDB's estimates",
+    )
+
+    parser.add_argument("--all", action="store_true", help="Export all tables in the database")
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_EXPORT_WORKERS,
+        help=(
+            "Number of tables to export in parallel with --all "
+            f"(default: {DEFAULT_EXPORT_WORKERS})"
+        ),
+    )
+
     parser.add_argument(
         "--format",
-        choices=["csv", "excel", "json", "parquet"],
-        default="csv",
-        help="Output format (default: csv)",
+        type=parse_formats,
+        default=["csv"],
+        help=(
+            f"Output format: {', '.join(EXPORT_FORMATS)}, or a comma-separated list "
+            "such as csv,parquet to write several formats in parallel (default: csv)"
+        ),
     )
 
     parser.add_argument(
@@ -311,44 +970,116 @@ def main():
         "--where", help="WHERE clause to filter data (ignored if --query is provided)"
     )
 
+    parser.add_argument(
+        "--columns",
+        nargs="+",
+        help="Columns to export instead of all of them (ignored if --query is provided)",
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Number of DuckDB worker threads (default: all CPU cores)",
+    )
+
+    parser.add_argument(
+        "--memory-limit",
+        help="DuckDB memory limit, e.g. 8GB (default: DuckDB's default)",
+    )
+
+    parser.add_argument(
+        "--json-lines",
+        action="store_true",
+        help="Write JSON as newline-delimited records (one object per line)",
+    )
+
+    parser.add_argument(
+        "--segment-size",
+        type=int,
+        help=(
+            "Split CSV, JSON and Excel exports into numbered files of at most this many rows "
+            f"(Excel is always split, default: {EXCEL_SEGMENT_ROWS:,} rows per workbook)"
+        ),
+    )
+
     parser.add_argument(
         "--compression",
-        choices=["snappy", "gzip", "brotli", "zstd", "none"],
-        default="snappy",
-        help="Compression for Parquet files (default: snappy)",
+        choices=["zstd", "snappy", "gzip", "brotli", "none"],
+        default="zstd",
+        help="Compression for Parquet files (default: zstd)",
+    )
+
+    parser.add_argument(
+        "--compression-level",
+        type=int,
+        default=DEFAULT_ZSTD_LEVEL,
+        help=f"zstd compression level for Parquet files (default: {DEFAULT_ZSTD_LEVEL})",
     )
 
     args = parser.parse_args()
 
-    # List tables if requested
-    if args.list:
-        export_data(args.db_file)
+    # Open one read-only connection and share it for the whole run
+    try:
+        conn = duckdb.connect(args.db_file, read_only=True)
+        configure_connection(conn, threads=args.threads, memory_limit=args.memory_limit)
+    except Exception as e:
+        print(f"Error: {e}")
         return
 
-    # Export data
-    export_data(
-        db_file=args.db_file,
-        table_name=args.table,
-        output_format=args.format,
-        output_dir=args.output_dir,
-        query=args.query,
-        limit=args.limit,
-        where=args.where,
-        compression=args.compression,
-    )
+    try:
+        # List tables if requested
+        if args.list:
+            export_data(args.db_file, conn=conn, exact_counts=args.exact_counts)
+            return
+
+        # Export every table if requested
+        if args.all:
+            export_all_tables(
+                args.db_file,
+                conn,
+                output_format=args.format,
+                output_dir=args.output_dir,
+                limit=args.limit,
+                compression=args.compression,
+                compression_level=args.compression_level,
+                json_lines=args.json_lines,
+                segment_size=args.segment_size,
+                max_workers=args.workers,
+            )
+            return
 
+        # Export data
+        export_args = dict(
+            table_name=args.table,
+            output_dir=args.output_dir,
+            query=args.query,
+            limit=args.limit,
+            where=args.where,
+            columns=args.columns,
+            compression=args.compression,
+            compression_level=args.compression_level,
+            json_lines=args.json_lines,
+            segment_size=args.segment_size,
+        )
+        if len(args.format) == 1:
+            export_data(args.db_file, output_format=args.format[0], conn=conn, **export_args)
+        else:
+            exported = export_formats(args.db_file, conn, args.format, **export_args)
+            print(f"\nExported {exported} of {len(args.format)} formats")
+    finally:
+        conn.close()
 
-def debug_datetime_values(table_name, db_file="eduskunta.duckdb"):
+
+def debug_datetime_values(table_name, db_file="eduskunta.duckdb", conn=None):
     """Debug function to examine datetime values in a table."""
+    close_conn = conn is None
     try:
-        conn = duckdb.connect(db_file)
-        schema_name = "parliament_data"
-        try:
-            df = conn.execute(f"SELECT * FROM {schema_name}.{table_name} LIMIT 10").df()
-        except Exception:
-            schema_name = "main"
-            df = conn.execute(f"SELECT * FROM {schema_name}.{table_name} LIMIT 10").df()
-        
+        if conn is None:
+            conn = duckdb.connect(db_file, read_only=True)
+            configure_connection(conn)
+        schema_name = detect_schema(conn)
+        df = conn.execute(f"SELECT * FROM {qident(schema_name)}.{qident(table_name)} LIMIT 10").df()
+
         # Print information about each column
         print(f"\nDateTime columns in {table_name}:")
         for col in df.columns:
@@ -358,9 +1089,9 @@ def debug_datetime_values(table_name, db_file="eduskunta.duckdb"):
                 print("Sample values:")
                 for i, val in enumerate(sample_values):
                     print(f"  {i+1}. {val} (type: {type(val)})")
-                    if hasattr(val, 'tzinfo'):
+                    if hasattr(val, "tzinfo"):
                         print(f"     tzinfo: {val.tzinfo}")
-                
+
                 # Test conversion
                 print("\nConversion test:")
                 for i, val in enumerate(sample_values):
@@ -372,15 +1103,22 @@ def debug_datetime_values(table_name, db_file="eduskunta.duckdb"):
                                 utc_time = val.tz_convert("UTC")
                                 # Then convert to local time without timezone
                                 local_time = utc_time.tz_localize(None)
-                                print(f"  {i+1}. Original: {val} → UTC: {utc_time} → Local: {local_time}")
+                                print(
+                                    f"  {i+1}. Original: {val} → UTC: {utc_time}"
+                                    f" → Local: {local_time}"
+                                )
                             else:
                                 print(f"  {i+1}. Original: {val} (no timezone info)")
-                            
+
                         except Exception as e:
                             print(f"  {i+1}. Error converting {val}: {e}")
-    
+
     except Exception as e:
         print(f"Error debugging datetime values: {e}")
+    finally:
+        if close_conn and conn is not None:
+            conn.close()
+
 
 if __name__ == "__main__":
     # Uncomment to debug datetime values
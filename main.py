@@ -4,18 +4,24 @@ Finnish Parliament API downloader.
 Downloads data from the Eduskunta API and stores it in a DuckDB database.
 """
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import dlt
 import dlt.destinations  # For older dlt versions
 import duckdb
 from typing import Dict, List, Any, Optional, Tuple
 import time
 import datetime
+import email.utils
+import functools
+import inspect
 import argparse
 import sys
-import asyncio
-import aiohttp
+import collections
 import concurrent.futures
+import itertools
+import math
 import threading
 
 BASE_URL = "https://avoindata.eduskunta.fi/api/v1"
@@ -25,6 +31,30 @@ PER_PAGE = 100
 DEFAULT_CONCURRENT_REQUESTS = 3
 # Default rate limit in requests per second (can be overridden with --rate-limit)
 DEFAULT_RATE_LIMIT = 5.0
+# Number of times a failed API request is retried
+MAX_RETRIES = 3
+# HTTP statuses that are worth retrying after a backoff. 429 (Too Many Requests)
+# is retried too, but after pausing the shared rate limiter instead.
+RETRY_STATUSES = (500, 502, 503, 504)
+# Seconds to wait before the first retry of a server or connection error,
+# doubled for each retry after that
+RETRY_BACKOFF = 0.5
+# Seconds to wait after a 429 response that has no usable Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+# Seconds to wait for an API response
+REQUEST_TIMEOUT = 15
+# Weight of the latest page in the moving average used for the ETA
+ETA_SMOOTHING = 0.2
+# Minimum number of seconds between progress line redraws
+PROGRESS_INTERVAL = 0.1
+# File format dlt stages the rows in before loading them into DuckDB.
+# Parquet is bulk-loaded in one COPY, while dlt's default for DuckDB
+# (insert_values) loads the rows through INSERT statements.
+LOADER_FILE_FORMAT = "parquet"
+
+# Whether the installed dlt version accepts destination_options in dlt.pipeline.
+# This can't change during a run, so the signature is checked once at import.
+DLT_HAS_DESTINATION_OPTIONS = "destination_options" in inspect.signature(dlt.pipeline).parameters
 
 # ANSI Colors and formatting
 class Colors:
@@ -67,31 +97,71 @@ class RateLimiter:
         """Initialize rate limiter with tokens per second"""
         self.rate_limit = rate_limit
         self.tokens = rate_limit
-        self.last_update = time.time()
+        self.last_update = time.monotonic()
         self.lock = threading.Lock()
         
     def acquire(self):
-        """Acquire a token. Blocks if no tokens are available."""
+        """
+        Acquire a token. Blocks if no tokens are available.
+        
+        The token is reserved under the lock, which may leave the bucket in
+        debt, and the wait for it happens after the lock is released. Waiting
+        threads don't hold up each other, and each one sleeps until its own
+        slot comes up.
+        """
         with self.lock:
             # Refill the bucket based on time passed
-            now = time.time()
+            now = time.monotonic()
             time_passed = now - self.last_update
             self.tokens = min(self.rate_limit, self.tokens + time_passed * self.rate_limit)
             self.last_update = now
             
-            # If we don't have a full token, we need to wait
-            if self.tokens < 1.0:
-                sleep_time = (1.0 - self.tokens) / self.rate_limit
-                time.sleep(sleep_time)
-                self.tokens = 0.0
-                self.last_update = time.time()
-            else:
-                # Consume one token
-                self.tokens -= 1.0
+            # Consume one token; a negative balance is time owed to earlier callers
+            self.tokens -= 1.0
+            sleep_time = -self.tokens / self.rate_limit if self.tokens < 0.0 else 0.0
+        
+        if sleep_time > 0.0:
+            time.sleep(sleep_time)
+    
+    def pause(self, seconds: float):
+        """
+        Hold back all callers for at least the given number of seconds.
+        
+        Used when the server answers 429 Too Many Requests: every thread
+        waits out the server's Retry-After, not only the one that was rejected.
+        Callers that already reserved a later slot keep it.
+        """
+        with self.lock:
+            now = time.monotonic()
+            time_passed = now - self.last_update
+            self.tokens = min(self.rate_limit, self.tokens + time_passed * self.rate_limit)
+            self.last_update = now
+            self.tokens = min(self.tokens, -seconds * self.rate_limit)
 
 # Global rate limiter instance, will be initialized in main()
 rate_limiter = None
 
+def create_session(pool_size: int = DEFAULT_CONCURRENT_REQUESTS) -> requests.Session:
+    """
+    Create an HTTP session whose connection pool fits pool_size concurrent requests.
+
+    All API calls go through one session, so the download threads reuse
+    keep-alive connections instead of opening a new TCP + TLS connection
+    for every page. The adapter doesn't retry anything itself; api_get is
+    the only place requests are retried.
+    """
+    session = requests.Session()
+    # requests asks for compression by default; set it explicitly so it
+    # survives changes to the defaults and is visible in one place
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    adapter = HTTPAdapter(pool_maxsize=max(pool_size, DEFAULT_CONCURRENT_REQUESTS))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Global HTTP session, recreated in main() to match --concurrency
+http_session = create_session()
+
 # Global flag for colored output, will be initialized in main()
 use_colors = True
 
@@ -102,7 +172,15 @@ def format_text(text, color=None, emoji=None, bold=False):
     """
     if not use_colors:
         return text
-    
+    return styled_text(text, color, emoji, bold)
+
+# The same status messages and labels are formatted over and over, so the
+# styled strings are cached. The cache is kept small: progress counts, ETAs
+# and percentages are formatted once each and would only fill it up.
+# use_colors is checked before the cache, so switching it needs no cache_clear().
+@functools.lru_cache(maxsize=64)
+def styled_text(text, color=None, emoji=None, bold=False):
+    """Return text with the given ANSI styles and emoji prefix."""
     result = ""
     if emoji:
         result += f"{emoji} "
@@ -120,62 +198,140 @@ def format_text(text, color=None, emoji=None, bold=False):
         
     return result
 
-def get_all_tables() -> List[str]:
-    """Get a list of all available tables from the Eduskunta API."""
-    if rate_limiter:
-        rate_limiter.acquire()
-    response = requests.get(f"{BASE_URL}/tables/")
+# Whether a page response has been checked for compression during this run
+compression_checked = False
+
+def check_compression(response: requests.Response):
+    """Warn once per run if the API doesn't compress its responses."""
+    global compression_checked
+    if compression_checked:
+        return
+    compression_checked = True
+    encoding = response.headers.get("Content-Encoding", "")
+    if "gzip" not in encoding and "deflate" not in encoding:
+        print(format_text("Warning: The API sent an uncompressed response, downloads will use more bandwidth",
+                          Colors.YELLOW, Emoji.WARNING))
+
+def parse_json(response: requests.Response) -> Any:
+    """Decode a JSON response body with orjson, straight from the raw bytes."""
+    return orjson.loads(response.content)
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Return the seconds to wait from a Retry-After header, in seconds or as an HTTP date."""
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                retry_at = email.utils.parsedate_to_datetime(value)
+                return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return DEFAULT_RETRY_AFTER
+
+def api_get(url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+    """
+    Make a rate-limited GET request to the API using the shared HTTP session.
+    
+    The request is sent at most MAX_RETRIES + 1 times in total. A 429 Too
+    Many Requests response pauses the shared rate limiter for the server's
+    Retry-After time before the request is sent again. Server errors in
+    RETRY_STATUSES and failed connections are retried with exponential
+    backoff. Each attempt takes its own rate limiter token. Once the retries
+    run out, the last error is raised straight away, without waiting first.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        # Acquire a token from the rate limiter before making the request
+        if rate_limiter:
+            rate_limiter.acquire()
+        try:
+            response = http_session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            if last_attempt:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+            continue
+        
+        if response.status_code == 429 and not last_attempt:
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if rate_limiter:
+                rate_limiter.pause(delay)
+            else:
+                time.sleep(delay)
+        elif response.status_code in RETRY_STATUSES and not last_attempt:
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        else:
+            break
     response.raise_for_status()
-    return response.json()
+    return response
 
+@functools.lru_cache(maxsize=1)
+def get_all_tables() -> List[str]:
+    """
+    Get a list of all available tables from the Eduskunta API.
+    The list is fetched once per run and cached after that.
+    """
+    response = api_get(f"{BASE_URL}/tables/")
+    return parse_json(response)
+
+@functools.lru_cache(maxsize=1)
 def get_table_row_counts() -> Dict[str, int]:
-    """Get row counts for all tables using the dedicated endpoint."""
-    if rate_limiter:
-        rate_limiter.acquire()
-    response = requests.get(f"{BASE_URL}/tables/counts")
-    response.raise_for_status()
-    data = response.json()
+    """
+    Get row counts for all tables using the dedicated endpoint.
+    The counts are fetched once per run and cached, so each table download
+    doesn't request the counts of every table again.
+    """
+    response = api_get(f"{BASE_URL}/tables/counts")
+    data = parse_json(response)
     # Convert to a dictionary for easier lookup
     return {item["tableName"]: item["rowCount"] for item in data}
 
 def get_table_info(table_name: str) -> Dict[str, Any]:
     """Get information for a specific table."""
-    if rate_limiter:
-        rate_limiter.acquire()
-    response = requests.get(f"{BASE_URL}/tables/{table_name}/rows", params={"page": 0, "perPage": 1})
-    response.raise_for_status()
-    data = response.json()
+    response = api_get(f"{BASE_URL}/tables/{table_name}/rows", params={"page": 0, "perPage": 1})
+    data = parse_json(response)
     return {
         "row_count": data.get("rowCount", "unknown"),
         "columns": data.get("columnNames", [])
     }
     
-def fetch_page_with_retry(table_name: str, page: int, per_page: int, retries=3) -> Tuple[int, Dict]:
-    """Fetch a page of data from the API with retries using regular requests."""
-    url = f"{BASE_URL}/tables/{table_name}/rows"
-    params = {"page": page, "perPage": per_page}
-    
-    for attempt in range(retries):
-        try:
-            # Acquire a token from the rate limiter before making the request
-            if rate_limiter:
-                rate_limiter.acquire()
-                
-            response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            return page, data
-        except Exception as e:
-            if attempt == retries - 1:  # Last attempt
-                raise
-            
-            # Exponential backoff for retries
-            retry_delay = 0.5 * (2 ** attempt)
-            print(f"Retrying page {page} after error: {str(e)[:60]}... (attempt {attempt+1}/{retries})")
-            time.sleep(retry_delay)
+def fetch_page_with_retry(table_name: str, page: int, per_page: int) -> Tuple[int, Dict]:
+    """
+    Fetch a page of data from the API using the shared HTTP session.
+    Retries are handled by api_get.
+    """
+    response = api_get(f"{BASE_URL}/tables/{table_name}/rows", params={"page": page, "perPage": per_page})
+    check_compression(response)
+    return page, parse_json(response)
+
+def rows_to_dicts(column_names: Tuple[str, ...], rows: List[List[Any]]) -> List[Dict[str, Any]]:
+    """Convert the rowData of a page into row dicts keyed by column name."""
+    # Bind the builtins locally so the per-row loop doesn't look them up each time
+    _dict, _zip = dict, zip
+    return [_dict(_zip(column_names, row)) for row in rows]
 
 # Global dictionary to track page counts for each table
 table_page_counts = {}
+# Global dictionary of the row count the API reported for each downloaded table
+table_api_row_counts: Dict[str, int] = {}
+
+def record_api_row_count(table_name: str, row_count: int) -> None:
+    """
+    Record a row count the API reported for a table, for verifying the load.
+
+    The counts endpoint and page 0 of the table both report a count. If they
+    disagree, a warning is printed and the larger count is kept, so the
+    verification doesn't pass on the smaller one.
+    """
+    previous = table_api_row_counts.get(table_name)
+    if previous is not None and previous != row_count:
+        print(format_text(
+            f"Row counts of {table_name} disagree: the API reported both {previous} and {row_count} rows",
+            Colors.YELLOW, Emoji.WARNING,
+        ))
+        row_count = max(previous, row_count)
+    table_api_row_counts[table_name] = row_count
 
 @dlt.resource(name="eduskunta_table", write_disposition="replace")
 def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_requests: int = DEFAULT_CONCURRENT_REQUESTS, row_limit: Optional[int] = None):
@@ -199,6 +355,8 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
     try:
         row_counts = get_table_row_counts()
         row_count = row_counts.get(table_name, None)
+        if row_count is not None:
+            record_api_row_count(table_name, row_count)
         
         if row_count is not None and row_count > 0:
             total_pages = (row_count + PER_PAGE - 1) // PER_PAGE
@@ -208,133 +366,168 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
         print(f"Warning: Couldn't get row counts: {e}")
         total_pages = None
     
-    # Get the first page (always needed) with rate limiting
-    if rate_limiter:
-        rate_limiter.acquire()
-    response = requests.get(
-        f"{BASE_URL}/tables/{table_name}/rows",
-        params={"page": 0, "perPage": PER_PAGE}
-    )
-    response.raise_for_status()
-    data = response.json()
-    
-    # Get column names
-    column_names = data.get("columnNames", [])
-    
     # Track total rows yielded so far
     total_rows_yielded = 0
-    
-    # Process first page data
-    first_page_rows = data.get("rowData", [])
-    
-    # Check if we have any rows
-    if not first_page_rows:
-        # If there are no rows but we have column names, create a placeholder
-        # This ensures the table exists in DuckDB even if there's no data
-        if column_names:
-            print(format_text(f"No data found for table {table_name}, creating schema-only table", Colors.YELLOW, Emoji.WARNING))
-            # Create an empty row with None values as a placeholder
-            placeholder = {col: None for col in column_names}
-            yield placeholder
-            total_rows_yielded += 1
-    else:
-        # Process normal rows
-        for row in first_page_rows:
-            yield dict(zip(column_names, row))
-            total_rows_yielded += 1
-            
+    # Column names, taken from the first page whichever way it is downloaded
+    column_names = None
+    
+    if total_pages is None:
+        # Get the first page on its own to find out the size of the table
+        _, data = fetch_page_with_retry(table_name, 0, PER_PAGE)
+        if "rowCount" in data:
+            record_api_row_count(table_name, data["rowCount"])
+        
+        # Get column names, interned once so every row dict shares the same key objects
+        column_names = tuple(sys.intern(name) for name in data.get("columnNames", []))
+        
+        # Process first page data
+        first_page_rows = data.get("rowData", [])
+        
+        # Check if we have any rows
+        if not first_page_rows:
+            # If there are no rows but we have column names, create a placeholder
+            # This ensures the table exists in DuckDB even if there's no data
+            if column_names:
+                print(format_text(f"No data found for table {table_name}, creating schema-only table", Colors.YELLOW, Emoji.WARNING))
+                # Create an empty row with None values as a placeholder
+                placeholder = {col: None for col in column_names}
+                yield placeholder
+                total_rows_yielded += 1
+        else:
+            # Process normal rows, trimmed to the row limit if one was given
+            if row_limit is not None:
+                first_page_rows = first_page_rows[:row_limit]
+            # Yield the whole page as one list: dlt handles it as a single batch
+            # instead of passing every row through its pipe separately
+            yield rows_to_dicts(column_names, first_page_rows)
+            total_rows_yielded += len(first_page_rows)
+        
             # Check if we've reached the row limit
             if row_limit is not None and total_rows_yielded >= row_limit:
                 print(format_text(f"\nReached row limit of {row_limit} rows", Colors.YELLOW, Emoji.INFO))
                 return
-    
-    # Update total pages if needed
-    if total_pages is None and "rowCount" in data and data["rowCount"] > 0:
-        total_pages = (data["rowCount"] + PER_PAGE - 1) // PER_PAGE
-    
-    # Show initial progress with inline updating
-    if show_progress and total_pages:
-        progress_percent = 1 / total_pages
-        bar_width = 20
-        filled_width = int(bar_width * progress_percent)
-        bar = '█' * filled_width + '░' * (bar_width - filled_width)
         
-        count_text = format_text(f"1/{total_pages}", Colors.BRIGHT_CYAN, bold=True)
-        table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
-        bar_text = format_text(f"[{bar}]", Colors.YELLOW)
-        percent_text = format_text(f"{progress_percent:.1%}", Colors.BRIGHT_GREEN, bold=True)
-        download_icon = format_text("", Emoji.DOWNLOAD)
+        # Update total pages if needed
+        if total_pages is None and "rowCount" in data and data["rowCount"] > 0:
+            total_pages = (data["rowCount"] + PER_PAGE - 1) // PER_PAGE
+        
+        # Show initial progress with inline updating
+        if show_progress and total_pages:
+            progress_percent = 1 / total_pages
+            bar_width = 20
+            filled_width = int(bar_width * progress_percent)
+            bar = '█' * filled_width + '░' * (bar_width - filled_width)
         
-        print(f"\r{download_icon}Downloaded {count_text} pages of {table_text} {bar_text} {percent_text}\033[K", end='', flush=True)
-    else:
-        # Handle the case where total_pages might be None
-        if total_pages is not None:
             count_text = format_text(f"1/{total_pages}", Colors.BRIGHT_CYAN, bold=True)
+            table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
+            bar_text = format_text(f"[{bar}]", Colors.YELLOW)
+            percent_text = format_text(f"{progress_percent:.1%}", Colors.BRIGHT_GREEN, bold=True)
+            download_icon = format_text("", Emoji.DOWNLOAD)
+        
+            print(f"\r{download_icon}Downloaded {count_text} pages of {table_text} {bar_text} {percent_text}\033[K", end='', flush=True)
         else:
-            count_text = format_text("1/?", Colors.BRIGHT_CYAN, bold=True)
-            
-        table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
-        download_icon = format_text("", Emoji.DOWNLOAD)
+            # Handle the case where total_pages might be None
+            if total_pages is not None:
+                count_text = format_text(f"1/{total_pages}", Colors.BRIGHT_CYAN, bold=True)
+            else:
+                count_text = format_text("1/?", Colors.BRIGHT_CYAN, bold=True)
         
-        print(f"\r{download_icon}Downloaded {count_text} pages of {table_text}\033[K", end='', flush=True)
-    
-    # If there's only one page or no more pages, we're done
-    has_more = data.get("hasMore", False)
-    if not has_more or (total_pages is not None and total_pages <= 1):
-        # Print a newline to move to the next line after progress display
-        print()
+            table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
+            download_icon = format_text("", Emoji.DOWNLOAD)
         
-        # Format completion message
-        table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
-        check_icon = format_text("", Emoji.CHECK)
+            print(f"\r{download_icon}Downloaded {count_text} pages of {table_text}\033[K", end='', flush=True)
         
-        print(f"{check_icon}Downloaded 1 page from {table_text}")
-        return
+        # If there's only one page or no more pages, we're done
+        has_more = data.get("hasMore", False)
+        if not has_more or total_pages is None or total_pages <= 1:
+            # Print a newline to move to the next line after progress display
+            print()
+            if has_more:
+                # Without a row count there is no page range to download
+                print(format_text(f"Row count of {table_name} is unknown, only the first page was downloaded", Colors.YELLOW, Emoji.WARNING))
+        
+            # Format completion message
+            table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
+            check_icon = format_text("", Emoji.CHECK)
+        
+            print(f"{check_icon}Downloaded 1 page from {table_text}")
+            return
+        
+        first_page = 1
+    else:
+        # The page count is already known, so page 0 is downloaded
+        # concurrently with the other pages instead of before them
+        first_page = 0
+    # The page count is known on both paths by now
+    pages: int = total_pages
+    if row_limit is not None:
+        # Only request the pages needed to reach the row limit
+        pages = min(pages, first_page + math.ceil((row_limit - total_rows_yielded) / PER_PAGE))
     
     # Start time tracking for ETA calculation
     start_time = time.time()
     
-    # Use ThreadPoolExecutor for concurrent requests
-    # This is simpler and more reliable than asyncio for this use case
-    processed_pages = {0: first_page_rows}  # Already processed page 0
-    page_times = []  # For ETA calculation
+    # Exponential moving average of the wall time between page completions, for the ETA
+    avg_time_per_page = None
+    last_completion = start_time
+    # Time of the last progress redraw, for limiting redraws to PROGRESS_INTERVAL
+    last_progress = 0.0
+    # Pages are requested a bounded window ahead of the page being yielded,
+    # so only that window is held in memory instead of the whole table
+    window_size = 2 * max_concurrent_requests
     
     # Use ThreadPoolExecutor to download remaining pages
+    # This is simpler and more reliable than asyncio for this use case
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_requests) as executor:
-        # Submit all page requests (from page 1 onwards)
-        future_to_page = {
-            executor.submit(fetch_page_with_retry, table_name, page, PER_PAGE): page
-            for page in range(1, total_pages)
-        }
+        remaining = iter(range(first_page, pages))
+        pending = collections.deque(
+            (page, executor.submit(fetch_page_with_retry, table_name, page, PER_PAGE))
+            for page in itertools.islice(remaining, window_size)
+        )
         
-        # Process as they complete
+        # Yield pages in order as soon as the next one has arrived
         completed = 0
-        for future in concurrent.futures.as_completed(future_to_page):
-            page = future_to_page[future]
+        while pending:
+            page, future = pending.popleft()
+            next_page = next(remaining, None)
+            if next_page is not None:
+                pending.append((next_page, executor.submit(fetch_page_with_retry, table_name, next_page, PER_PAGE)))
             
             try:
                 # Get the result
                 page_num, page_data = future.result()
+                if page_num == 0 and "rowCount" in page_data:
+                    # Page 0 was fetched concurrently, check its count as well
+                    record_api_row_count(table_name, page_data["rowCount"])
+                if column_names is None:
+                    column_names = tuple(sys.intern(name) for name in page_data.get("columnNames", []))
                 
-                # Store the data
-                if "rowData" in page_data:
-                    processed_pages[page_num] = page_data["rowData"]
+                # Yield the page, trimmed to the row limit if one was given
+                page_rows = page_data.get("rowData", [])
+                if row_limit is not None:
+                    page_rows = page_rows[:row_limit - total_rows_yielded]
+                if page_rows:
+                    yield rows_to_dicts(column_names, page_rows)
+                    total_rows_yielded += len(page_rows)
                 
-                # Record time for ETA calculation
+                # Update the ETA average with the time since the previous page
                 completion_time = time.time()
-                page_times.append(completion_time - start_time)
+                page_time = completion_time - last_completion
+                last_completion = completion_time
+                if avg_time_per_page is None:
+                    avg_time_per_page = page_time
+                else:
+                    avg_time_per_page = ETA_SMOOTHING * page_time + (1 - ETA_SMOOTHING) * avg_time_per_page
                 
                 # Update completed count for progress display
                 completed += 1
                 
-                # Calculate ETA based on average time per page and workers
-                if len(page_times) > 0:
-                    # Use the most recent times for better accuracy
-                    recent_times = page_times[-min(5, len(page_times)):]
-                    avg_time_per_page = sum(recent_times) / len(recent_times) / max_concurrent_requests
-                    
-                    # Calculate remaining time
-                    remaining_pages = total_pages - (completed + 1)  # +1 for first page
+                # Only redraw the progress line a few times per second and on the last page
+                if completion_time - last_progress >= PROGRESS_INTERVAL or completed + first_page >= pages:
+                    last_progress = completion_time
+                    # Pages complete max_concurrent_requests at a time, so the time
+                    # between completions already is the wall time per page
+                    remaining_pages = pages - (completed + first_page)  # + page 0 if it was fetched first
                     est_remaining_seconds = remaining_pages * avg_time_per_page
                     
                     # Format estimated time remaining
@@ -347,7 +540,7 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
                     
                     # Update progress display using a single line with ANSI escape codes
                     if show_progress:
-                        progress_percent = (completed + 1) / total_pages  # +1 for first page
+                        progress_percent = (completed + first_page) / pages
                         bar_width = 20
                         filled_width = int(bar_width * progress_percent)
                         bar = '█' * filled_width + '░' * (bar_width - filled_width)
@@ -363,7 +556,7 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
                         else:
                             color = Colors.GREEN
                             
-                        count_text = format_text(f"{completed+1}/{total_pages}", Colors.BRIGHT_CYAN, bold=True)
+                        count_text = format_text(f"{completed + first_page}/{pages}", Colors.BRIGHT_CYAN, bold=True)
                         table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
                         bar_text = format_text(f"[{bar}]", color)
                         percent_text = format_text(f"{progress_percent:.1%}", Colors.BRIGHT_GREEN, bold=True)
@@ -372,7 +565,7 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
                         progress_msg = f"Downloaded {count_text} pages of {table_text} {bar_text} {percent_text} {eta_text}\033[K"
                         print(f"\r{progress_msg}", end='', flush=True)
                     else:
-                        count_text = format_text(f"{completed+1}/{total_pages}", Colors.BRIGHT_CYAN, bold=True)
+                        count_text = format_text(f"{completed + first_page}/{pages}", Colors.BRIGHT_CYAN, bold=True)
                         table_text = format_text(table_name, Colors.BRIGHT_YELLOW, bold=True)
                         eta_text = format_text(f"ETA: {eta}", Colors.GREY, Emoji.TIME)
                         
@@ -381,21 +574,12 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
                 
             except Exception as e:
                 print(f"Error processing page {page}: {e}")
-    
-    # Process all downloaded pages in order
-    for page_num in range(1, total_pages):
-        if page_num in processed_pages:
-            for row in processed_pages[page_num]:
-                yield dict(zip(column_names, row))
-                total_rows_yielded += 1
-                
-                # Check if we've reached the row limit
-                if row_limit is not None and total_rows_yielded >= row_limit:
-                    print(format_text(f"\nReached row limit of {row_limit} rows", Colors.YELLOW, Emoji.INFO))
-                    break
             
-            # If we've reached the row limit, stop processing pages
+            # Once the row limit is reached, drop the pages not started yet
             if row_limit is not None and total_rows_yielded >= row_limit:
+                print(format_text(f"\nReached row limit of {row_limit} rows", Colors.YELLOW, Emoji.INFO))
+                for _, pending_future in pending:
+                    pending_future.cancel()
                 break
     
     # Print a newline to move to the next line after progress display
@@ -410,8 +594,8 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
     else:
         time_str = f"{total_time/3600:.1f} hours"
     
-    # Total pages includes the first page (page 0) plus all other pages
-    total_pages = completed + 1
+    # Total pages includes page 0 if it was fetched before the others
+    total_pages = completed + first_page
     
     # Update global page count tracker
     table_page_counts[table_name] = total_pages
@@ -422,7 +606,8 @@ def eduskunta_table(table_name: str, show_progress: bool = True, max_concurrent_
     time_text = format_text(time_str, Colors.BRIGHT_GREEN, Emoji.TIME, bold=True)
     check_icon = format_text("", Emoji.CHECK)
     
-    print(f"{check_icon}Downloaded {pages_text} pages from {table_text} in {time_text}")
+    page_word = "page" if total_pages == 1 else "pages"
+    print(f"{check_icon}Downloaded {pages_text} {page_word} from {table_text} in {time_text}")
 
 def parse_args():
     """Parse command line arguments."""
@@ -450,11 +635,15 @@ def main():
         return
     
     # Initialize the global rate limiter with the provided rate limit
-    global rate_limiter, use_colors
+    global rate_limiter, use_colors, http_session
     rate_limiter = RateLimiter(args.rate_limit)
     
-    # Set the global color flag based on command-line option
-    use_colors = not args.no_color
+    # Size the HTTP connection pool for the concurrent page downloads
+    http_session = create_session(args.concurrency)
+    
+    # Set the global color flag based on command-line option. Colors and emojis
+    # are also left out when the output is piped or redirected to a file.
+    use_colors = not args.no_color and sys.stdout.isatty()
     
     # Start time for total download timer
     start_time = time.time()
@@ -472,14 +661,25 @@ def main():
         print("Retrieving row counts...")
         row_counts = get_table_row_counts()
         
+        # Fetch the column info of all tables concurrently
+        def fetch_info(table):
+            try:
+                return get_table_info(table)
+            except Exception as e:
+                return e
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            table_infos = list(executor.map(fetch_info, all_tables))
+        
         print("\nAvailable tables:")
-        for table in all_tables:
+        for table, info in zip(all_tables, table_infos):
             try:
                 # Get row count from our pre-fetched data
                 row_count = row_counts.get(table, "unknown")
                 
-                # Get additional table info for columns
-                info = get_table_info(table)
+                # Raise the error from fetching the table info, if any
+                if isinstance(info, Exception):
+                    raise info
                 
                 # Just display the number of columns when row count is 1 or 0
                 if row_count == 1 or row_count == 0:
@@ -535,12 +735,18 @@ def main():
         print("No tables specified. Please use --tables or --all to specify which tables to download.")
         return
 
-    # Initialize the pipeline with DuckDB destination
-    # Check if dlt version supports destination_options
-    import inspect
-    pipeline_sig = inspect.signature(dlt.pipeline)
+    # Open the database once, for loading and for verifying the loaded tables.
+    # The tables don't need to keep the order rows were inserted in, which
+    # lets DuckDB load dlt's Parquet files in parallel and with less memory.
+    try:
+        db_conn = duckdb.connect(args.db_file)
+        db_conn.execute("SET preserve_insertion_order = false")
+    except Exception as e:
+        print(format_text(f"Error opening database {args.db_file}: {e}", Colors.RED, Emoji.ERROR))
+        return
 
-    if "destination_options" in pipeline_sig.parameters:
+    # Initialize the pipeline with DuckDB destination
+    if DLT_HAS_DESTINATION_OPTIONS:
         # Newer dlt version
         pipeline = dlt.pipeline(
             pipeline_name="eduskunta",
@@ -549,10 +755,10 @@ def main():
             destination_options={"file_path": args.db_file}
         )
     else:
-        # Older dlt version - configure directly with duckdb destination
+        # Destination factory - load through the connection opened above
         pipeline = dlt.pipeline(
             pipeline_name="eduskunta",
-            destination=dlt.destinations.duckdb(file_path=args.db_file),
+            destination=dlt.destinations.duckdb(credentials=db_conn),
             dataset_name="parliament_data"
         )
 
@@ -585,14 +791,17 @@ def main():
                     limit_text = format_text(str(args.limit), Colors.BRIGHT_YELLOW, bold=True)
                     print(format_text(f"Row limit set to {limit_text} rows", Colors.CYAN, Emoji.INFO))
                 
+                # Each table gets its own resource name: with a shared name, dlt's
+                # replace disposition would also truncate the tables loaded before
                 load_info = pipeline.run(
                     eduskunta_table(
                         table_name=table, 
                         show_progress=not args.no_progress,
                         max_concurrent_requests=args.concurrency,
                         row_limit=args.limit
-                    ),
-                    table_name=table.lower()
+                    ).with_name(table.lower()),
+                    table_name=table.lower(),
+                    loader_file_format=LOADER_FILE_FORMAT
                 )
                 
                 # Calculate table download time
@@ -606,29 +815,23 @@ def main():
                 
                 # Get row count from API and from DuckDB for verification
                 try:
-                    # Get expected row count from API
-                    api_row_count = None
-                    try:
-                        row_counts = get_table_row_counts()
-                        if table in row_counts:
-                            api_row_count = row_counts[table]
-                    except Exception:
-                        # Try alternate method if the first failed
+                    # Get expected row count from API, as seen by the download itself
+                    api_row_count = table_api_row_counts.get(table)
+                    if api_row_count is None:
+                        # Ask the API only if the download didn't learn the row count
                         try:
-                            if rate_limiter:
-                                rate_limiter.acquire()
-                            response = requests.get(f"{BASE_URL}/tables/{table}/rows", params={"page": 0, "perPage": 1})
-                            data = response.json()
+                            response = api_get(f"{BASE_URL}/tables/{table}/rows", params={"page": 0, "perPage": 1})
+                            data = parse_json(response)
                             if "rowCount" in data:
                                 api_row_count = data["rowCount"]
                         except Exception:
                             pass
                     
                     # Get actual row count from database
-                    conn = duckdb.connect(args.db_file)
-                    result = conn.execute(f"SELECT COUNT(*) FROM parliament_data.{table.lower()}").fetchone()
+                    # Count exactly: after a replace DuckDB's catalog estimate still
+                    # includes the truncated rows until the next checkpoint
+                    result = db_conn.execute(f"SELECT COUNT(*) FROM parliament_data.{table.lower()}").fetchone()
                     db_row_count = result[0] if result else 0
-                    conn.close()
                     
                     # Store both counts and check for discrepancies
                     if api_row_count is not None and db_row_count != api_row_count:
@@ -678,23 +881,11 @@ def main():
     else:
         time_str = f"{total_download_time/3600:.1f} hours"
     
-    # Count total rows downloaded
-    total_rows = 0
-    try:
-        if successful_tables > 0:
-            conn = duckdb.connect(args.db_file)
-            for table in tables_to_load:
-                if table in all_tables:
-                    try:
-                        result = conn.execute(f"SELECT COUNT(*) FROM parliament_data.{table.lower()}").fetchone()
-                        if result:
-                            total_rows += result[0]
-                    except Exception:
-                        # Table might not exist if download failed
-                        pass
-            conn.close()
-    except Exception as e:
-        print(f"Warning: Couldn't count rows in database: {e}")
+    # Count total rows downloaded from the counts taken during verification
+    total_rows = sum(
+        summary['rows'] for summary in table_summaries.values() if isinstance(summary['rows'], int)
+    )
+    db_conn.close()
 
     # Print detailed summary with colors and emojis
     divider = format_text("="*60, Colors.GREY)
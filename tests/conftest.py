@@ -3,43 +3,60 @@ Fixtures and configuration for pytest.
 """
 
 import os
+import re
+import sys
 import json
+import functools
+import types
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
+
+# Make the top-level modules (main, db_utils, export_data) importable from the
+# test files, once for the whole run
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def pytest_addoption(parser):
+    """Add the option that turns on the integration tests."""
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="Run the integration tests, which call the real API",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_cmdline_main(config):
+    """
+    Run the integration tests in a single process.
+
+    pytest.ini runs the tests in parallel with pytest-xdist. The integration
+    tests call the live, rate-limited API, so --run-integration turns the
+    workers off again, as if -n 0 had been given.
+    """
+    if config.getoption("--run-integration") and hasattr(config.option, "numprocesses"):
+        config.option.numprocesses = 0
+        config.option.dist = "no"
 
-# Mock dlt.resource decorator
-@pytest.fixture(autouse=True)
-def mock_dlt_resource(monkeypatch):
-    """Mock the dlt.resource decorator to assign expected attributes."""
-    original_resource = getattr(pytest.importorskip("dlt"), "resource", None)
-    
-    def mock_resource(*args, **kwargs):
-        def decorator(func):
-            # Preserve the original behavior if possible
-            if original_resource:
-                decorated = original_resource(*args, **kwargs)(func)
-            else:
-                decorated = func
-                
-            # Ensure resource_name attribute is set
-            if 'name' in kwargs:
-                decorated.resource_name = kwargs['name']
-            if 'write_disposition' in kwargs:
-                decorated.write_disposition = kwargs['write_disposition']
-            return decorated
-        return decorator
-    
-    monkeypatch.setattr("dlt.resource", mock_resource)
-    return mock_resource
+
+# main declares its dlt resources when it is imported, so the tests need dlt
+pytest.importorskip("dlt")
 
 # Path relative to the tests directory for sample data
 SAMPLE_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
 
-@pytest.fixture
+# The sample fixtures below are built once per session and shared by all tests.
+# Tests must copy them before changing anything, so they are read-only to catch
+# accidental changes.
+
+@pytest.fixture(scope="session")
 def sample_table_list():
     """Return a sample list of tables from the API."""
-    return [
+    return (
         "SaliDBAanestys",
         "SaliDBAanestysAsiakirja",
         "SaliDBAanestysEdustaja",
@@ -48,59 +65,93 @@ def sample_table_list():
         "HEAsiat",
         "HEIstunto",
         "VaskiData",
-    ]
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_row_counts():
     """Return a sample of row counts from the API."""
-    return {
+    return types.MappingProxyType({
         "SaliDBAanestys": 41967,
         "SaliDBAanestysAsiakirja": 11536863,
         "SaliDBAanestysEdustaja": 8353394,
         "HETiedot": 5678,
         "HEAsiat": 12345,
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_table_data():
-    """Return sample data for a table."""
-    return {
+    """Return sample data for a table (copy it before changing keys)."""
+    return types.MappingProxyType({
         "tableName": "SaliDBAanestys",
         "columnCount": 5,
-        "columnNames": [
+        "columnNames": (
             "AanestysId",
             "IstuntoId",
             "KohtaOtsikko",
             "Aanestystapa",
             "Pvm",
-        ],
+        ),
         "rowCount": 100,
-        "rowData": [
-            [1, 123, "Test item 1", "Manual", "2023-01-01"],
-            [2, 123, "Test item 2", "Manual", "2023-01-01"],
-            [3, 124, "Test item 3", "Electronic", "2023-01-02"],
-            [4, 124, "Test item 4", "Electronic", "2023-01-02"],
-            [5, 125, "Test item 5", "Manual", "2023-01-03"],
-        ],
+        "rowData": (
+            (1, 123, "Test item 1", "Manual", "2023-01-01"),
+            (2, 123, "Test item 2", "Manual", "2023-01-01"),
+            (3, 124, "Test item 3", "Electronic", "2023-01-02"),
+            (4, 124, "Test item 4", "Electronic", "2023-01-02"),
+            (5, 125, "Test item 5", "Manual", "2023-01-03"),
+        ),
         "page": 0,
         "perPage": 5,
         "hasMore": True,
-    }
+    })
 
 
-@pytest.fixture
-def mock_requests(monkeypatch):
+@pytest.fixture(scope="session")
+def sample_table_data_last_page(sample_table_data):
+    """Return the sample table data as the last page of the table."""
+    return {**sample_table_data, "hasMore": False}
+
+
+@pytest.fixture(scope="session")
+def sample_table_data_has_more(sample_table_data):
+    """Return the sample table data as a page with more pages after it."""
+    return {**sample_table_data, "hasMore": True}
+
+
+@pytest.fixture(autouse=True)
+def clear_api_caches():
+    """Drop API responses cached by earlier tests."""
+    main_module = sys.modules.get("main")
+    if main_module is not None:
+        main_module.get_all_tables.cache_clear()
+        main_module.get_table_row_counts.cache_clear()
+
+
+def _patch_requests(monkeypatch, track_calls):
     """
     Mocks the requests library to return predefined responses
     based on the URL.
+    
+    With track_calls the replacement is a MagicMock, so tests can check the
+    calls made. Otherwise it is the plain function, which skips the call
+    recording.
     """
     class MockResponse:
         def __init__(self, json_data, status_code=200):
             self.json_data = json_data
             self.status_code = status_code
-            self.text = json.dumps(json_data)
+            self.headers = {"Content-Encoding": "gzip"}
+        
+        # The body is only serialized when a test or parse_json reads it.
+        # Read-only sample mappings are written as JSON objects.
+        @functools.cached_property
+        def text(self):
+            return json.dumps(self.json_data, default=dict)
+        
+        @functools.cached_property
+        def content(self):
+            return self.text.encode("utf-8")
             
         def json(self):
             return self.json_data
@@ -109,63 +160,82 @@ def mock_requests(monkeypatch):
             if self.status_code >= 400:
                 raise Exception(f"HTTP Error {self.status_code}")
     
-    # Create a mock for the requests.get method
-    mock_get = MagicMock()
-    
     # Dict to store URL patterns and their responses
     responses = {}
+    # All patterns as one regex, rebuilt on the next request after add_response
+    matcher = {"regex": None}
     
     # Function to add responses
     def add_response(url_pattern, json_data, status_code=200):
         responses[url_pattern] = (json_data, status_code)
+        matcher["regex"] = None
+    
+    # Function to add several responses, given as {url_pattern: (json_data, status_code)}
+    def add_responses(mapping):
+        responses.update(mapping)
+        matcher["regex"] = None
     
     # Function that simulates requests.get behavior
     def mock_requests_get(url, params=None, timeout=None, **kwargs):
-        # Match against patterns and known URLs
-        for pattern, (data, code) in responses.items():
-            if pattern in url:
-                return MockResponse(data, code)
+        # Match against patterns and known URLs with a single search. Patterns
+        # that match at the same place are tried in the order they were added.
+        if matcher["regex"] is None and responses:
+            matcher["regex"] = re.compile("|".join(re.escape(p) for p in responses))
+        match = matcher["regex"].search(url) if responses else None
+        if match:
+            data, code = responses[match.group(0)]
+            return MockResponse(data, code)
         
         # Default response for unknown URLs
         return MockResponse({"error": "Not mocked"}, 404)
     
-    # Apply the mock
-    mock_get.side_effect = mock_requests_get
-    monkeypatch.setattr("requests.get", mock_get)
+    # Apply the mock to both module-level and session requests
+    if track_calls:
+        mock_get = MagicMock(side_effect=mock_requests_get)
+        monkeypatch.setattr("requests.get", mock_get)
+        monkeypatch.setattr("requests.Session.get", mock_get)
+    else:
+        mock_get = mock_requests_get
+        monkeypatch.setattr("requests.get", mock_get)
+        # A plain function would be bound to the session, a MagicMock isn't
+        monkeypatch.setattr("requests.Session.get", staticmethod(mock_get))
     
     # Add the helper function as an attribute
     mock_get.add_response = add_response
+    mock_get.add_responses = add_responses
     
     return mock_get
 
 
 @pytest.fixture
-def mock_duckdb(monkeypatch):
-    """Mock DuckDB connection and operations."""
-    # Create a mock connection
-    mock_conn = MagicMock()
-    
-    # Mock execute method to return a predefined cursor
-    mock_execute = MagicMock()
-    mock_conn.execute = mock_execute
-    
-    # Mock the fetchone and fetchall methods of the cursor
-    mock_fetchone = MagicMock(return_value=[0])
-    mock_fetchall = MagicMock(return_value=[])
-    
-    # Set up the mock to return these methods
-    mock_execute.return_value.fetchone = mock_fetchone
-    mock_execute.return_value.fetchall = mock_fetchall
-    
-    # Mock the duckdb.connect function to return our mock connection
-    mock_connect = MagicMock(return_value=mock_conn)
-    monkeypatch.setattr("duckdb.connect", mock_connect)
-    
-    # Return the mock with some helper attributes
-    return {
-        "connect": mock_connect,
-        "connection": mock_conn,
-        "execute": mock_execute,
-        "fetchone": mock_fetchone,
-        "fetchall": mock_fetchall,
-    }
\ No newline at end of file
+def mock_requests(monkeypatch):
+    """Mock requests with a MagicMock that records the calls made."""
+    return _patch_requests(monkeypatch, track_calls=True)
+
+
+@pytest.fixture
+def fast_mock_requests(monkeypatch):
+    """Mock requests for tests that only need the responses, not the calls."""
+    return _patch_requests(monkeypatch, track_calls=False)
+
+
+@pytest.fixture
+def sample_db_file(tmp_path):
+    """Create a small DuckDB database laid out like the downloader's output."""
+    import duckdb
+
+    db_file = str(tmp_path / "sample.duckdb")
+    conn = duckdb.connect(db_file)
+    conn.execute("CREATE SCHEMA parliament_data")
+    conn.execute(
+        """
+        CREATE TABLE parliament_data.salidbaanestys AS
+        SELECT
+            range AS aanestys_id,
+            'Item ' || range AS kohta_otsikko,
+            TIMESTAMPTZ '2023-01-01 12:00:00+00' + INTERVAL (range) HOUR AS pvm
+        FROM range(25)
+        """
+    )
+    conn.close()
+    return db_file
@@ -0,0 +1,14 @@
+"""
+Configuration for the integration tests.
+"""
+
+
+def pytest_ignore_collect(collection_path, config):
+    """
+    Leave the integration test modules out unless --run-integration is given.
+
+    They call the real API, so a default test run doesn't even import them.
+    """
+    if collection_path.name.startswith("test_") and not config.getoption("--run-integration"):
+        return True
+    return None
@@ -1,15 +1,12 @@
 """
 Integration tests for API connectivity and functionality.
 These tests will actually call the API if run, so they're marked as integration tests
-and will be skipped by default unless explicitly requested.
+and are only collected when pytest is run with --run-integration.
 """
 
 import pytest
 
 # Import functions to test
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from main import get_all_tables, get_table_row_counts, get_table_info
 
 # Base API URL for validation
@@ -2,14 +2,52 @@
 Unit tests for API-related functions in main.py
 """
 
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
+import requests
 from unittest.mock import patch, MagicMock
 
 # Import the functions to test
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from main import get_all_tables, get_table_row_counts, get_table_info
+from main import (
+    api_get, create_session, check_compression, parse_json, parse_retry_after,
+    get_all_tables, get_table_row_counts, get_table_info,
+    DEFAULT_CONCURRENT_REQUESTS, DEFAULT_RETRY_AFTER, MAX_RETRIES, RETRY_BACKOFF,
+)
+
+
+@pytest.fixture
+def local_api():
+    """
+    Serve a fixed response over real HTTP on localhost and count the requests.
+
+    Requests to it go through the session's real HTTPAdapter and urllib3,
+    unlike the mock_requests fixtures, which replace Session.get.
+    """
+    state = {"status": 200, "headers": {}, "hits": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["hits"] += 1
+            body = b"{}"
+            self.send_response(state["status"])
+            for name, value in state["headers"].items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/tables/"
+    yield state
+    server.shutdown()
+    server.server_close()
 
 
 @pytest.mark.unit
@@ -25,7 +63,7 @@ class TestApiFunctions:
         result = get_all_tables()
         
         # Verify the result
-        assert result == sample_table_list
+        assert result == list(sample_table_list)
         assert mock_requests.call_count == 1
         
     def test_get_table_row_counts(self, mock_requests):
@@ -49,6 +87,18 @@ class TestApiFunctions:
         }
         assert result == expected
         assert mock_requests.call_count == 1
+        
+    def test_get_table_row_counts_cached(self, mock_requests):
+        """Test that row counts are requested only once per run."""
+        mock_requests.add_response('/tables/counts', [
+            {"tableName": "SaliDBAanestys", "rowCount": 41967},
+        ])
+        
+        first = get_table_row_counts()
+        second = get_table_row_counts()
+        
+        assert first == second == {"SaliDBAanestys": 41967}
+        assert mock_requests.call_count == 1
     
     def test_get_table_info(self, mock_requests, sample_table_data):
         """Test get_table_info function."""
@@ -63,7 +113,7 @@ class TestApiFunctions:
         
         # Verify the result
         assert result["row_count"] == sample_table_data["rowCount"]
-        assert result["columns"] == sample_table_data["columnNames"]
+        assert result["columns"] == list(sample_table_data["columnNames"])
         assert mock_requests.call_count == 1
         
     def test_get_table_info_with_error(self, mock_requests):
@@ -77,4 +127,175 @@ class TestApiFunctions:
         
         # Call the function and verify it raises an exception
         with pytest.raises(Exception):
-            get_table_info("NonExistentTable")
\ No newline at end of file
+            get_table_info("NonExistentTable")
+
+
+@pytest.mark.unit
+class TestParseJson:
+    """Tests for decoding API responses."""
+
+    def test_parse_json(self):
+        """Test that the raw UTF-8 body is decoded."""
+        response = MagicMock()
+        body = '{"tableName": "HETiedot", "rowData": [["Pääministeri"]]}'
+        response.content = body.encode("utf-8")
+
+        assert parse_json(response) == {"tableName": "HETiedot", "rowData": [["Pääministeri"]]}
+
+
+@pytest.mark.unit
+class TestSession:
+    """Tests for the shared HTTP session."""
+
+    def test_pool_fits_concurrency(self):
+        """Test that the connection pool holds one connection per concurrent request."""
+        session = create_session(20)
+
+        assert session.get_adapter("https://avoindata.eduskunta.fi")._pool_maxsize == 20
+
+    def test_pool_minimum_size(self):
+        """Test that the pool is never smaller than the default concurrency."""
+        session = create_session(1)
+
+        adapter = session.get_adapter("https://avoindata.eduskunta.fi")
+        assert adapter._pool_maxsize == DEFAULT_CONCURRENT_REQUESTS
+
+    def test_adapter_does_not_retry(self):
+        """Test that the session leaves all retrying to api_get."""
+        session = create_session()
+
+        retry = session.get_adapter("https://avoindata.eduskunta.fi").max_retries
+        assert retry.total == 0
+
+    def test_requests_compression(self):
+        """Test that the session asks the API for compressed responses."""
+        session = create_session()
+
+        assert session.headers["Accept-Encoding"] == "gzip, deflate"
+
+
+@pytest.mark.unit
+class TestCheckCompression:
+    """Tests for the warning about uncompressed API responses."""
+
+    @patch('main.compression_checked', False)
+    def test_warns_once_for_uncompressed(self, capsys):
+        """Test that an uncompressed response is reported once per run."""
+        response = MagicMock()
+        response.headers = {}
+
+        check_compression(response)
+        check_compression(response)
+
+        assert capsys.readouterr().out.count("uncompressed response") == 1
+
+    @patch('main.compression_checked', False)
+    def test_no_warning_for_gzip(self, capsys):
+        """Test that a gzip response is accepted silently."""
+        response = MagicMock()
+        response.headers = {"Content-Encoding": "gzip"}
+
+        check_compression(response)
+
+        assert capsys.readouterr().out == ""
+
+
+@pytest.mark.unit
+class TestRetries:
+    """Tests for retrying server and connection errors in api_get."""
+
+    def test_stuck_server_error_sends_max_retries_plus_one(self, local_api):
+        """Test that a server that keeps failing gets MAX_RETRIES + 1 requests in total."""
+        local_api["status"] = 503
+
+        with patch('main.http_session', create_session()), \
+                patch('main.rate_limiter') as limiter, \
+                patch('main.time.sleep') as sleep, pytest.raises(requests.HTTPError):
+            api_get(local_api["url"])
+
+        assert local_api["hits"] == MAX_RETRIES + 1
+        assert limiter.acquire.call_count == MAX_RETRIES + 1
+        # Exponential backoff between the attempts, none after the last one
+        assert [c.args[0] for c in sleep.call_args_list] == [
+            RETRY_BACKOFF * 2 ** attempt for attempt in range(MAX_RETRIES)
+        ]
+
+    def test_recovers_after_server_error(self, mock_requests):
+        """Test that a request that fails once succeeds on the retry."""
+        failed = MagicMock(status_code=503, headers={})
+        ok = MagicMock(status_code=200, headers={})
+        mock_requests.side_effect = [failed, ok]
+
+        with patch('main.rate_limiter', None), patch('main.time.sleep'):
+            assert api_get("https://example.invalid/tables/") is ok
+
+    def test_retries_connection_errors(self, mock_requests):
+        """Test that connection errors are retried and raised once the retries run out."""
+        mock_requests.side_effect = requests.ConnectionError("refused")
+
+        with patch('main.rate_limiter', None), patch('main.time.sleep'), \
+                pytest.raises(requests.ConnectionError):
+            api_get("https://example.invalid/tables/")
+
+        assert mock_requests.call_count == MAX_RETRIES + 1
+
+
+@pytest.mark.unit
+class TestTooManyRequests:
+    """Tests for handling 429 Too Many Requests responses."""
+
+    def test_parse_retry_after_seconds(self):
+        """Test Retry-After given in seconds, and the default when it's missing."""
+        assert parse_retry_after("2.5") == 2.5
+        assert parse_retry_after(None) == DEFAULT_RETRY_AFTER
+        assert parse_retry_after("soon") == DEFAULT_RETRY_AFTER
+
+    def test_parse_retry_after_date(self):
+        """Test Retry-After given as an HTTP date in the past."""
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    def test_pauses_rate_limiter_and_retries(self, mock_requests):
+        """Test that a 429 pauses the shared rate limiter before the request is retried."""
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "3"})
+        ok = MagicMock(status_code=200, headers={})
+        mock_requests.side_effect = [throttled, ok]
+
+        with patch('main.rate_limiter') as limiter:
+            assert api_get("https://example.invalid/tables/") is ok
+
+        limiter.pause.assert_called_once_with(3.0)
+        assert limiter.acquire.call_count == 2
+
+    def test_gives_up_after_max_retries(self, mock_requests):
+        """Test that a server that keeps answering 429 raises an HTTP error."""
+        mock_requests.add_response('/tables/', {"error": "Too many requests"}, 429)
+
+        with patch('main.rate_limiter') as limiter, pytest.raises(Exception):
+            api_get("https://example.invalid/tables/")
+
+        # The final 429 is raised straight away instead of pausing first
+        assert limiter.pause.call_count == MAX_RETRIES
+
+    def test_final_429_without_rate_limiter(self, mock_requests):
+        """Test that the final 429 is raised without sleeping when there is no rate limiter."""
+        mock_requests.add_response('/tables/', {"error": "Too many requests"}, 429)
+
+        with patch('main.rate_limiter', None), patch('main.time.sleep') as sleep, \
+                pytest.raises(Exception):
+            api_get("https://example.invalid/tables/")
+
+        assert mock_requests.call_count == MAX_RETRIES + 1
+        assert sleep.call_count == MAX_RETRIES
+
+    def test_adapter_leaves_429_to_api_get(self, local_api):
+        """Test that a 429 with Retry-After isn't also retried inside the HTTP adapter."""
+        local_api["status"] = 429
+        local_api["headers"] = {"Retry-After": "0"}
+
+        with patch('main.http_session', create_session()), \
+                patch('main.rate_limiter') as limiter, pytest.raises(Exception):
+            api_get(local_api["url"])
+
+        # One request per api_get attempt, each rejection but the last pausing the limiter
+        assert local_api["hits"] == MAX_RETRIES + 1
+        assert limiter.pause.call_count == MAX_RETRIES
@@ -0,0 +1,174 @@
+"""
+Unit tests for the shared DuckDB helpers in db_utils.py
+"""
+
+import os
+
+import pytest
+import duckdb
+
+# Import the functions to test
+from db_utils import configure_connection, count_table_rows, describe_table, detect_schema, qident
+
+
+@pytest.mark.unit
+class TestCountTableRows:
+    """Tests for count_table_rows."""
+
+    def test_counts_all_tables(self, sample_db_file):
+        """Test that every table is counted in one pass."""
+        conn = duckdb.connect(sample_db_file)
+        conn.execute("CREATE TABLE parliament_data.hetiedot AS SELECT range AS id FROM range(7)")
+
+        result = count_table_rows(conn)
+        conn.close()
+
+        assert result == [("hetiedot", 7), ("salidbaanestys", 25)]
+
+    def test_estimated_counts(self, sample_db_file):
+        """Test reading row counts from the catalog without scanning."""
+        conn = duckdb.connect(sample_db_file)
+        conn.execute("CREATE TABLE parliament_data.hetiedot AS SELECT range AS id FROM range(7)")
+
+        result = count_table_rows(conn, exact=False)
+        conn.close()
+
+        assert result == [("hetiedot", 7), ("salidbaanestys", 25)]
+
+    def test_main_schema(self, tmp_path):
+        """Test a database without the parliament_data schema."""
+        conn = duckdb.connect(str(tmp_path / "main.duckdb"))
+        conn.execute("CREATE TABLE votes AS SELECT range AS id FROM range(3)")
+
+        assert count_table_rows(conn) == [("votes", 3)]
+        assert count_table_rows(conn, exact=False) == [("votes", 3)]
+        conn.close()
+
+    def test_only_detected_schema(self, sample_db_file):
+        """Test that tables outside the detected data schema aren't listed."""
+        conn = duckdb.connect(sample_db_file)
+        conn.execute("CREATE TABLE main.salidbaanestys AS SELECT range AS id FROM range(3)")
+        conn.execute("CREATE TABLE main.scratch AS SELECT range AS id FROM range(2)")
+
+        assert count_table_rows(conn) == [("salidbaanestys", 25)]
+        assert count_table_rows(conn, exact=False) == [("salidbaanestys", 25)]
+        conn.close()
+
+    def test_empty_database(self, tmp_path):
+        """Test that an empty database yields no counts."""
+        conn = duckdb.connect(str(tmp_path / "empty.duckdb"))
+
+        assert count_table_rows(conn) == []
+        conn.close()
+
+
+@pytest.mark.unit
+class TestDetectSchema:
+    """Tests for detect_schema."""
+
+    def test_parliament_data_schema(self, sample_db_file):
+        """Test that the dlt schema is preferred."""
+        conn = duckdb.connect(sample_db_file)
+
+        assert detect_schema(conn) == "parliament_data"
+        conn.close()
+
+    def test_main_schema(self, tmp_path):
+        """Test falling back to the main schema."""
+        conn = duckdb.connect(str(tmp_path / "main.duckdb"))
+        conn.execute("CREATE TABLE votes AS SELECT 1 AS id")
+
+        assert detect_schema(conn) == "main"
+        conn.close()
+
+    def test_result_is_cached(self, sample_db_file):
+        """Test that the catalog is queried only once per connection."""
+        conn = duckdb.connect(sample_db_file)
+        assert detect_schema(conn) == "parliament_data"
+
+        # Later schema changes are not seen on the same connection
+        conn.execute("DROP TABLE parliament_data.salidbaanestys")
+        assert detect_schema(conn) == "parliament_data"
+        conn.close()
+
+
+@pytest.mark.unit
+class TestDescribeTable:
+    """Tests for describe_table."""
+
+    def test_describe(self, sample_db_file):
+        """Test that the columns of a table are returned, matching the name case-insensitively."""
+        conn = duckdb.connect(sample_db_file)
+        columns = describe_table(conn, "SaliDBAanestys")
+        conn.close()
+
+        assert [row[0] for row in columns] == ["aanestys_id", "kohta_otsikko", "pvm"]
+        assert columns[2][1] == "TIMESTAMP WITH TIME ZONE"
+
+    def test_result_is_cached(self, sample_db_file):
+        """Test that a table is described once per connection, ignoring case."""
+        conn = duckdb.connect(sample_db_file)
+        first = describe_table(conn, "salidbaanestys")
+
+        conn.execute("ALTER TABLE parliament_data.salidbaanestys ADD COLUMN extra INTEGER")
+        assert describe_table(conn, "SaliDBAanestys") is first
+        conn.close()
+
+    def test_missing_table(self, sample_db_file):
+        """Test that a missing table raises and is not cached."""
+        conn = duckdb.connect(sample_db_file)
+        with pytest.raises(duckdb.Error):
+            describe_table(conn, "missing_table")
+
+        conn.execute("CREATE TABLE parliament_data.missing_table AS SELECT 1 AS id")
+        assert describe_table(conn, "missing_table")[0][0] == "id"
+        conn.close()
+
+
+@pytest.mark.unit
+class TestQident:
+    """Tests for identifier quoting."""
+
+    def test_plain_name(self):
+        """Test quoting a regular table name."""
+        assert qident("salidbaanestys") == '"salidbaanestys"'
+
+    def test_embedded_quotes(self):
+        """Test that embedded double quotes are escaped."""
+        assert qident('bad"; DROP TABLE x; --') == '"bad""; DROP TABLE x; --"'
+
+    def test_quoted_name_is_case_insensitive(self, sample_db_file):
+        """Test that quoted names still match tables regardless of case."""
+        conn = duckdb.connect(sample_db_file)
+        query = f"SELECT COUNT(*) FROM {qident('parliament_data')}.{qident('SaliDBAanestys')}"
+
+        assert conn.execute(query).fetchone() == (25,)
+        conn.close()
+
+
+@pytest.mark.unit
+class TestConfigureConnection:
+    """Tests for configure_connection."""
+
+    def test_explicit_settings(self):
+        """Test that thread count and memory limit are applied."""
+        conn = duckdb.connect()
+
+        configure_connection(conn, threads=2, memory_limit="1GB")
+
+        threads, memory_limit = conn.execute(
+            "SELECT current_setting('threads'), current_setting('memory_limit')"
+        ).fetchone()
+        conn.close()
+        assert threads == 2
+        assert memory_limit == "953.6 MiB"
+
+    def test_defaults_to_all_cores(self):
+        """Test that all CPU cores are used by default."""
+        conn = duckdb.connect()
+
+        configure_connection(conn)
+
+        threads = conn.execute("SELECT current_setting('threads')").fetchone()[0]
+        conn.close()
+        assert threads == (os.cpu_count() or 1)
@@ -0,0 +1,783 @@
+"""
+Unit tests for export_data.py
+"""
+
+import pytest
+import argparse
+import csv
+import json
+import os
+import duckdb
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Import the functions to test
+import export_data as export_module
+from export_data import (
+    debug_datetime_values,
+    export_all_tables,
+    export_data,
+    export_formats,
+    export_to_csv,
+    export_to_excel,
+    export_to_json,
+    export_to_parquet,
+    copy_query_to_file,
+    get_query_arrow,
+    get_query_batches,
+    parse_formats,
+    strip_timezones,
+    write_excel,
+    write_parquet_batches,
+)
+
+
+@pytest.fixture
+def failing_copy(monkeypatch):
+    """Make DuckDB's COPY path fail so the exporters use their fallbacks."""
+
+    def copy_query_to_file(*args, **kwargs):
+        raise RuntimeError("COPY failed")
+
+    monkeypatch.setattr(export_module, "copy_query_to_file", copy_query_to_file)
+
+
+@pytest.mark.unit
+class TestParquetExport:
+    """Tests for the Parquet export path."""
+
+    def test_copy_query_to_file(self, sample_db_file, tmp_path):
+        """Test that COPY reports the number of rows written."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.parquet")
+
+        rows = copy_query_to_file(
+            conn, "SELECT * FROM parliament_data.salidbaanestys", output_path, "FORMAT PARQUET"
+        )
+        conn.close()
+
+        assert rows == 25
+        assert pq.read_table(output_path).num_rows == 25
+
+    @pytest.mark.parametrize("compression", ["snappy", "zstd", None])
+    def test_export_to_parquet(self, sample_db_file, tmp_path, compression):
+        """Test exporting query results to Parquet with different codecs."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.parquet")
+
+        rows = export_to_parquet(
+            conn,
+            "SELECT * FROM parliament_data.salidbaanestys LIMIT 10",
+            output_path,
+            compression=compression,
+        )
+        conn.close()
+
+        assert rows == 10
+        table = pq.read_table(output_path)
+        assert table.num_rows == 10
+        assert table.column_names == ["aanestys_id", "kohta_otsikko", "pvm"]
+
+    def test_parquet_defaults_to_zstd(self, sample_db_file, tmp_path):
+        """Test that Parquet files are zstd-compressed unless asked otherwise."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.parquet")
+
+        export_to_parquet(conn, "SELECT * FROM parliament_data.salidbaanestys", output_path)
+        conn.close()
+
+        column = pq.ParquetFile(output_path).metadata.row_group(0).column(0)
+        assert column.compression == "ZSTD"
+
+    def test_export_data_parquet(self, sample_db_file, tmp_path, capsys):
+        """Test the export_data entry point for Parquet."""
+        export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_format="parquet",
+            output_dir=str(tmp_path),
+            limit=5,
+        )
+
+        output = capsys.readouterr().out
+        assert "- Rows exported: 5" in output
+        assert "- Columns: 3" in output
+        assert pq.read_table(str(tmp_path / "salidbaanestys.parquet")).num_rows == 5
+
+
+@pytest.mark.unit
+class TestTextExport:
+    """Tests for the CSV and JSON export paths."""
+
+    def test_export_to_csv(self, sample_db_file, tmp_path):
+        """Test exporting query results to CSV with a header row."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.csv")
+
+        rows = export_to_csv(
+            conn, "SELECT * FROM parliament_data.salidbaanestys LIMIT 3", output_path
+        )
+        conn.close()
+
+        assert rows == 3
+        with open(output_path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+        assert len(records) == 3
+        assert records[0]["kohta_otsikko"] == "Item 0"
+
+    def test_export_to_json(self, sample_db_file, tmp_path):
+        """Test exporting query results to a JSON array of records."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.json")
+
+        rows = export_to_json(
+            conn, "SELECT * FROM parliament_data.salidbaanestys LIMIT 3", output_path
+        )
+        conn.close()
+
+        assert rows == 3
+        with open(output_path, encoding="utf-8") as f:
+            records = json.load(f)
+        assert [r["aanestys_id"] for r in records] == [0, 1, 2]
+
+    def test_export_to_json_lines(self, sample_db_file, tmp_path):
+        """Test exporting query results as newline-delimited JSON."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.jsonl")
+
+        rows = export_to_json(
+            conn,
+            "SELECT aanestys_id FROM parliament_data.salidbaanestys LIMIT 3",
+            output_path,
+            lines=True,
+        )
+        conn.close()
+
+        assert rows == 3
+        with open(output_path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == [
+                {"aanestys_id": 0},
+                {"aanestys_id": 1},
+                {"aanestys_id": 2},
+            ]
+
+    def test_export_to_json_other_orient(self, sample_db_file, tmp_path):
+        """Test that non-record orientations go through pandas."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.json")
+
+        rows = export_to_json(
+            conn,
+            "SELECT aanestys_id FROM parliament_data.salidbaanestys LIMIT 3",
+            output_path,
+            orient="columns",
+        )
+        conn.close()
+
+        assert rows == 3
+        with open(output_path, encoding="utf-8") as f:
+            assert json.load(f) == {"aanestys_id": {"0": 0, "1": 1, "2": 2}}
+
+
+@pytest.mark.unit
+class TestSharedConnection:
+    """Tests for reusing a caller-provided connection."""
+
+    def test_export_data_keeps_connection_open(self, sample_db_file, tmp_path):
+        """Test that export_data doesn't close a connection it didn't open."""
+        conn = duckdb.connect(sample_db_file, read_only=True)
+
+        export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_dir=str(tmp_path),
+            conn=conn,
+        )
+
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+        conn.close()
+        assert (tmp_path / "salidbaanestys.csv").exists()
+
+    def test_debug_datetime_values_with_connection(self, sample_db_file, capsys):
+        """Test debugging datetime values on a shared connection."""
+        conn = duckdb.connect(sample_db_file, read_only=True)
+
+        debug_datetime_values("salidbaanestys", conn=conn)
+
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+        conn.close()
+        assert "Column: pvm" in capsys.readouterr().out
+
+
+@pytest.mark.unit
+class TestColumnSelection:
+    """Tests for exporting a subset of a table's columns."""
+
+    def test_export_selected_columns(self, sample_db_file, tmp_path):
+        """Test that only the requested columns are exported, in the requested order."""
+        out_dir = tmp_path / "out"
+
+        assert export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_dir=str(out_dir),
+            columns=["kohta_otsikko", "AANESTYS_ID"],
+            limit=2,
+        )
+
+        with open(out_dir / "salidbaanestys.csv", newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+        assert list(records[0].keys()) == ["kohta_otsikko", "aanestys_id"]
+        assert records[1] == {"kohta_otsikko": "Item 1", "aanestys_id": "1"}
+
+    def test_unknown_column(self, sample_db_file, tmp_path, capsys):
+        """Test that an unknown column is reported without writing a file."""
+        out_dir = tmp_path / "out"
+
+        assert not export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_dir=str(out_dir),
+            columns=["aanestys_id", "missing"],
+        )
+
+        assert "Unknown columns in table 'salidbaanestys': missing" in capsys.readouterr().out
+        assert not (out_dir / "salidbaanestys.csv").exists()
+
+
+@pytest.mark.unit
+class TestListTables:
+    """Tests for the --list output of export_data."""
+
+    def test_list_tables_with_estimates(self, sample_db_file, capsys):
+        """Test that tables are listed with estimated row counts by default."""
+        export_data(sample_db_file)
+
+        output = capsys.readouterr().out
+        assert "Available tables (1):" in output
+        assert "1. salidbaanestys (~25 rows)" in output
+
+    def test_list_tables_with_exact_counts(self, sample_db_file, capsys):
+        """Test that exact counts are shown on request."""
+        export_data(sample_db_file, exact_counts=True)
+
+        output = capsys.readouterr().out
+        assert "1. salidbaanestys (25 rows)" in output
+
+
+@pytest.mark.unit
+class TestExcelExport:
+    """Tests for the Excel export path."""
+
+    @staticmethod
+    def _read_rows(output_path):
+        worksheet = openpyxl.load_workbook(output_path).active
+        return [[cell.value for cell in row] for row in worksheet.iter_rows()]
+
+    def test_write_excel_streams_all_cells(self, tmp_path):
+        """Test that every cell survives constant_memory mode, with blanks for missing values."""
+        df = pd.DataFrame(
+            {
+                "id": [1, 2, 3],
+                "name": ["a", None, "c"],
+                "score": [1.5, float("nan"), 3.0],
+                "pvm": pd.to_datetime(["2023-01-01 12:00", None, "2023-01-03 00:00"], utc=True),
+            }
+        )
+        output_path = str(tmp_path / "out.xlsx")
+
+        write_excel(df, output_path)
+
+        rows = self._read_rows(output_path)
+        assert rows[0] == ["id", "name", "score", "pvm"]
+        assert rows[1][:3] == [1, "a", 1.5]
+        assert rows[1][3] == pd.Timestamp("2023-01-01 12:00").to_pydatetime()
+        assert rows[2] == [2, None, None, None]
+        assert rows[3][:3] == [3, "c", 3]
+
+    def test_export_to_excel(self, sample_db_file, tmp_path):
+        """Test that values keep their types and timezone-aware dates become naive UTC."""
+        conn = duckdb.connect(sample_db_file)
+        df = conn.execute("SELECT * FROM parliament_data.salidbaanestys LIMIT 2").df()
+        conn.close()
+        output_path = str(tmp_path / "out.xlsx")
+
+        assert export_to_excel(df, output_path)
+
+        rows = self._read_rows(output_path)
+        assert rows[0] == ["aanestys_id", "kohta_otsikko", "pvm"]
+        assert len(rows) == 3
+        assert rows[1][0] == 0
+        assert rows[1][2] == pd.Timestamp("2023-01-01 12:00:00").to_pydatetime()
+
+    def test_export_to_excel_mixed_object_column(self, tmp_path):
+        """Test that timezone-aware values in object columns are converted to UTC."""
+        df = pd.DataFrame(
+            {
+                "value": pd.Series(
+                    [pd.Timestamp("2023-01-01 12:00", tz="America/New_York"), "text"], dtype=object
+                )
+            }
+        )
+        output_path = str(tmp_path / "out.xlsx")
+
+        assert export_to_excel(df, output_path)
+
+        rows = self._read_rows(output_path)
+        assert rows[1][0] == pd.Timestamp("2023-01-01 17:00").to_pydatetime()
+        assert rows[2][0] == "text"
+
+    def test_export_to_excel_too_many_rows(self, tmp_path, monkeypatch, capsys):
+        """Test that frames too large for one worksheet are rejected up front."""
+        monkeypatch.setattr(export_module, "EXCEL_MAX_ROWS", 2)
+        output_path = tmp_path / "out.xlsx"
+
+        assert not export_to_excel(pd.DataFrame({"id": [1, 2, 3]}), str(output_path))
+
+        assert not output_path.exists()
+        assert "more than the 2 rows" in capsys.readouterr().out
+
+    def test_excel_string_fallback(self, tmp_path, monkeypatch):
+        """Test that the fallback writes every value as a string."""
+        write_excel_calls = []
+        original_write_excel = export_module.write_excel
+
+        # Fail the first (typed) attempt only
+        def flaky_write_excel(df, output_path):
+            write_excel_calls.append(df)
+            if len(write_excel_calls) == 1:
+                raise ValueError("write failed")
+            return original_write_excel(df, output_path)
+
+        monkeypatch.setattr(export_module, "write_excel", flaky_write_excel)
+        df = pd.DataFrame({"id": [1, 2]})
+        output_path = str(tmp_path / "out.xlsx")
+
+        assert export_to_excel(df, output_path)
+
+        assert self._read_rows(output_path) == [["id"], ["1"], ["2"]]
+
+
+@pytest.mark.unit
+class TestArrowFallback:
+    """Tests for the PyArrow writers used when COPY fails."""
+
+    def test_get_query_arrow(self, sample_db_file):
+        """Test fetching query results as an Arrow table."""
+        conn = duckdb.connect(sample_db_file)
+
+        table = get_query_arrow(conn, "SELECT * FROM parliament_data.salidbaanestys")
+        conn.close()
+
+        assert table.num_rows == 25
+        assert table.column_names == ["aanestys_id", "kohta_otsikko", "pvm"]
+
+    def test_get_query_arrow_error(self, sample_db_file):
+        """Test that query errors return None."""
+        conn = duckdb.connect(sample_db_file)
+
+        assert get_query_arrow(conn, "SELECT * FROM missing_table") is None
+        conn.close()
+
+    def test_csv_fallback(self, sample_db_file, tmp_path, failing_copy):
+        """Test writing CSV through PyArrow."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.csv")
+
+        rows = export_to_csv(
+            conn, "SELECT * FROM parliament_data.salidbaanestys LIMIT 4", output_path
+        )
+        conn.close()
+
+        assert rows == 4
+        with open(output_path, newline="", encoding="utf-8") as f:
+            assert len(list(csv.DictReader(f))) == 4
+
+    def test_json_fallback(self, sample_db_file, tmp_path, failing_copy, monkeypatch):
+        """Test streaming JSON records with orjson across several batches."""
+        monkeypatch.setattr(export_module, "JSON_BATCH_SIZE", 10)
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.json")
+
+        rows = export_to_json(conn, "SELECT * FROM parliament_data.salidbaanestys", output_path)
+        conn.close()
+
+        assert rows == 25
+        with open(output_path, encoding="utf-8") as f:
+            records = json.load(f)
+        assert len(records) == 25
+        assert records[0]["kohta_otsikko"] == "Item 0"
+        assert records[0]["pvm"].startswith("2023-01-01 ")
+
+    def test_json_lines_fallback(self, sample_db_file, tmp_path, failing_copy, monkeypatch):
+        """Test streaming newline-delimited JSON with orjson."""
+        monkeypatch.setattr(export_module, "JSON_BATCH_SIZE", 10)
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.jsonl")
+
+        rows = export_to_json(
+            conn, "SELECT * FROM parliament_data.salidbaanestys", output_path, lines=True
+        )
+        conn.close()
+
+        assert rows == 25
+        with open(output_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [r["aanestys_id"] for r in records] == list(range(25))
+
+    def test_json_fallback_types(self, tmp_path, failing_copy):
+        """Test that the orjson fallback writes values like DuckDB's JSON writer."""
+        conn = duckdb.connect()
+        query = (
+            "SELECT 1.50::DECIMAL(5, 2) AS amount, DATE '2023-01-01' AS day, "
+            "[1, 2] AS ids, NULL AS missing, 'x'::BLOB AS data"
+        )
+        output_path = str(tmp_path / "out.json")
+
+        export_to_json(conn, query, output_path)
+        conn.close()
+
+        with open(output_path, encoding="utf-8") as f:
+            assert json.load(f) == [
+                {"amount": 1.5, "day": "2023-01-01", "ids": [1, 2], "missing": None, "data": "x"}
+            ]
+
+    @pytest.mark.parametrize("lines", [False, True], ids=["array", "lines"])
+    @pytest.mark.parametrize("timezone", ["UTC", "Europe/Helsinki", "Asia/Kolkata"])
+    def test_json_fallback_matches_copy(self, tmp_path, monkeypatch, lines, timezone):
+        """Test that the orjson fallback writes dates and times exactly like COPY."""
+        conn = duckdb.connect()
+        conn.execute(f"SET TimeZone = '{timezone}'")
+        query = (
+            "SELECT * FROM (VALUES "
+            "(TIMESTAMPTZ '2023-01-01 12:00:00+00', TIMESTAMP '2023-06-01 08:30:00', "
+            "DATE '2023-01-02', TIME '12:30:00'), "
+            "(TIMESTAMPTZ '2023-07-01 12:00:00.123456+00', TIMESTAMP '2023-06-01 08:30:00.5', "
+            "DATE '1999-12-31', TIME '23:59:59.25')"
+            ") AS t(pvm, luotu, paiva, aika)"
+        )
+        copy_path = tmp_path / "copy.json"
+        fallback_path = tmp_path / "fallback.json"
+
+        export_to_json(conn, query, str(copy_path), lines=lines)
+
+        def copy_query_to_file(*args, **kwargs):
+            raise RuntimeError("COPY failed")
+
+        monkeypatch.setattr(export_module, "copy_query_to_file", copy_query_to_file)
+        export_to_json(conn, query, str(fallback_path), lines=lines)
+        conn.close()
+
+        assert fallback_path.read_bytes() == copy_path.read_bytes()
+
+    def test_json_fallback_empty(self, sample_db_file, tmp_path, failing_copy):
+        """Test that an empty result is written as an empty JSON array."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.json")
+
+        rows = export_to_json(
+            conn, "SELECT * FROM parliament_data.salidbaanestys WHERE false", output_path
+        )
+        conn.close()
+
+        assert rows == 0
+        with open(output_path, encoding="utf-8") as f:
+            assert json.load(f) == []
+
+    def test_csv_fallback_in_batches(self, sample_db_file, tmp_path, failing_copy, monkeypatch):
+        """Test that batched CSV output has one header and every row."""
+        monkeypatch.setattr(export_module, "CSV_BATCH_SIZE", 10)
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.csv")
+
+        rows = export_to_csv(conn, "SELECT * FROM parliament_data.salidbaanestys", output_path)
+        conn.close()
+
+        assert rows == 25
+        with open(output_path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+        assert len(records) == 25
+        assert [int(r["aanestys_id"]) for r in records] == list(range(25))
+
+    def test_write_parquet_batches(self, sample_db_file, tmp_path):
+        """Test that batches are streamed to Parquet one at a time."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.parquet")
+
+        reader = get_query_batches(
+            conn, "SELECT * FROM parliament_data.salidbaanestys", batch_size=10
+        )
+        rows = write_parquet_batches(reader, output_path, "zstd")
+        conn.close()
+
+        assert rows == 25
+        metadata = pq.ParquetFile(output_path).metadata
+        assert metadata.num_rows == 25
+        assert metadata.num_row_groups == 3
+        assert metadata.format_version == "2.6"
+
+    def test_write_parquet_batches_row_group_size(self, sample_db_file, tmp_path, monkeypatch):
+        """Test that large batches are split into row groups of PARQUET_ROW_GROUP_SIZE rows."""
+        monkeypatch.setattr(export_module, "PARQUET_ROW_GROUP_SIZE", 10)
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.parquet")
+
+        reader = get_query_batches(conn, "SELECT * FROM parliament_data.salidbaanestys")
+        write_parquet_batches(reader, output_path, "zstd")
+        conn.close()
+
+        metadata = pq.ParquetFile(output_path).metadata
+        row_groups = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        assert row_groups == [10, 10, 5]
+
+    @pytest.mark.parametrize("compression", ["zstd", "gzip", None])
+    def test_parquet_fallback(self, sample_db_file, tmp_path, failing_copy, compression):
+        """Test writing Parquet through PyArrow."""
+        conn = duckdb.connect(sample_db_file)
+        output_path = str(tmp_path / "out.parquet")
+
+        rows = export_to_parquet(
+            conn,
+            "SELECT * FROM parliament_data.salidbaanestys LIMIT 4",
+            output_path,
+            compression=compression,
+        )
+        conn.close()
+
+        assert rows == 4
+        assert pq.read_table(output_path).num_rows == 4
+
+
+@pytest.mark.unit
+class TestStripTimezones:
+    """Tests for normalizing timestamps in Arrow batches."""
+
+    def test_timezone_aware_columns_become_naive_utc(self):
+        """Test that timezone-aware timestamps keep their UTC value without the timezone."""
+        batch = pa.record_batch(
+            [
+                pa.array([0], pa.timestamp("us", tz="America/New_York")),
+                pa.array([1], pa.timestamp("ms")),
+                pa.array(["a"]),
+            ],
+            names=["aware", "naive", "text"],
+        )
+
+        result = strip_timezones(batch)
+
+        assert result.schema.types == [pa.timestamp("us"), pa.timestamp("ms"), pa.string()]
+        assert result.column(0).to_pylist() == [pd.Timestamp("1970-01-01").to_pydatetime()]
+
+    def test_batch_without_timezones_is_returned_as_is(self):
+        """Test that batches needing no conversion are not copied."""
+        batch = pa.record_batch([pa.array([1, 2])], names=["id"])
+
+        assert strip_timezones(batch) is batch
+
+
+@pytest.mark.unit
+class TestSegmentedExport:
+    """Tests for splitting large exports into numbered files."""
+
+    def test_excel_single_segment(self, sample_db_file, tmp_path):
+        """Test that a result smaller than one segment keeps the plain file name."""
+        out_dir = tmp_path / "out"
+
+        assert export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_format="excel",
+            output_dir=str(out_dir),
+        )
+
+        assert sorted(os.listdir(out_dir)) == ["salidbaanestys.xlsx"]
+        rows = list(openpyxl.load_workbook(out_dir / "salidbaanestys.xlsx").active.iter_rows())
+        assert len(rows) == 26
+
+    def test_excel_segments(self, sample_db_file, tmp_path, monkeypatch, capsys):
+        """Test that Excel exports are split every EXCEL_SEGMENT_ROWS rows."""
+        monkeypatch.setattr(export_module, "EXCEL_SEGMENT_ROWS", 10)
+        out_dir = tmp_path / "out"
+
+        assert export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_format="excel",
+            output_dir=str(out_dir),
+        )
+
+        assert sorted(os.listdir(out_dir)) == [f"salidbaanestys_{i}.xlsx" for i in range(3)]
+        segment_rows = [
+            openpyxl.load_workbook(out_dir / f"salidbaanestys_{i}.xlsx").active.max_row - 1
+            for i in range(3)
+        ]
+        assert segment_rows == [10, 10, 5]
+        output = capsys.readouterr().out
+        assert "- Rows exported: 25" in output
+        assert "- Files: 3" in output
+
+    def test_csv_segments(self, sample_db_file, tmp_path):
+        """Test that --segment-size splits CSV exports, each file with a header."""
+        out_dir = tmp_path / "out"
+
+        assert export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_format="csv",
+            output_dir=str(out_dir),
+            segment_size=20,
+        )
+
+        ids = []
+        for i in range(2):
+            with open(out_dir / f"salidbaanestys_{i}.csv", newline="", encoding="utf-8") as f:
+                ids.extend(int(r["aanestys_id"]) for r in csv.DictReader(f))
+        assert ids == list(range(25))
+        assert len(os.listdir(out_dir)) == 2
+
+    def test_json_lines_segments(self, sample_db_file, tmp_path):
+        """Test that --segment-size splits newline-delimited JSON exports."""
+        out_dir = tmp_path / "out"
+
+        assert export_data(
+            sample_db_file,
+            table_name="salidbaanestys",
+            output_format="json",
+            output_dir=str(out_dir),
+            segment_size=10,
+            json_lines=True,
+        )
+
+        assert sorted(os.listdir(out_dir)) == [f"salidbaanestys_{i}.jsonl" for i in range(3)]
+        with open(out_dir / "salidbaanestys_2.jsonl", encoding="utf-8") as f:
+            assert [json.loads(line)["aanestys_id"] for line in f] == list(range(20, 25))
+
+    @pytest.mark.parametrize("output_format, json_lines", [("csv", False), ("json", True)])
+    def test_segments_match_unsegmented_export(
+        self, sample_db_file, tmp_path, output_format, json_lines
+    ):
+        """Test that segmented CSV and JSON lines concatenate to the unsegmented file."""
+        whole_dir = tmp_path / "whole"
+        segment_dir = tmp_path / "segments"
+        extension = "jsonl" if json_lines else "csv"
+        for out_dir, segment_size in ((whole_dir, None), (segment_dir, 10)):
+            assert export_data(
+                sample_db_file,
+                table_name="salidbaanestys",
+                output_format=output_format,
+                output_dir=str(out_dir),
+                segment_size=segment_size,
+                json_lines=json_lines,
+            )
+
+        whole = (whole_dir / f"salidbaanestys.{extension}").read_bytes()
+        segments = [
+            (segment_dir / f"salidbaanestys_{i}.{extension}").read_bytes() for i in range(3)
+        ]
+        if output_format == "csv":
+            # Every segment has its own header line
+            header = segments[0].split(b"\n", 1)[0] + b"\n"
+            assert all(segment.startswith(header) for segment in segments)
+            segments = [segments[0]] + [segment[len(header) :] for segment in segments[1:]]
+        assert b"".join(segments) == whole
+
+    def test_json_array_segments_match_unsegmented_export(self, sample_db_file, tmp_path):
+        """Test that segmented JSON arrays hold the same records as the unsegmented file."""
+        whole_dir = tmp_path / "whole"
+        segment_dir = tmp_path / "segments"
+        for out_dir, segment_size in ((whole_dir, None), (segment_dir, 10)):
+            assert export_data(
+                sample_db_file,
+                table_name="salidbaanestys",
+                output_format="json",
+                output_dir=str(out_dir),
+                segment_size=segment_size,
+            )
+
+        with open(whole_dir / "salidbaanestys.json", encoding="utf-8") as f:
+            whole = json.load(f)
+        records = []
+        for i in range(3):
+            with open(segment_dir / f"salidbaanestys_{i}.json", encoding="utf-8") as f:
+                records.extend(json.load(f))
+        assert records == whole
+
+
+@pytest.mark.unit
+class TestExportAllTables:
+    """Tests for exporting every table in parallel."""
+
+    def test_export_all_tables(self, sample_db_file, tmp_path):
+        """Test that all data tables are exported and dlt tables skipped."""
+        conn = duckdb.connect(sample_db_file)
+        conn.execute("CREATE TABLE parliament_data.hetiedot AS SELECT range AS id FROM range(7)")
+        conn.execute("CREATE TABLE parliament_data._dlt_loads AS SELECT 1 AS load_id")
+        conn.close()
+
+        conn = duckdb.connect(sample_db_file, read_only=True)
+        exported = export_all_tables(
+            sample_db_file,
+            conn,
+            output_format="parquet",
+            output_dir=str(tmp_path),
+            max_workers=2,
+        )
+        conn.close()
+
+        assert exported == 2
+        assert pq.read_table(str(tmp_path / "hetiedot.parquet")).num_rows == 7
+        assert pq.read_table(str(tmp_path / "salidbaanestys.parquet")).num_rows == 25
+        assert not (tmp_path / "_dlt_loads.parquet").exists()
+
+    def test_export_all_tables_several_formats(self, sample_db_file, tmp_path):
+        """Test that every table is exported to each requested format."""
+        conn = duckdb.connect(sample_db_file, read_only=True)
+        out_dir = tmp_path / "out"
+        exported = export_all_tables(
+            sample_db_file,
+            conn,
+            output_format=["csv", "parquet"],
+            output_dir=str(out_dir),
+        )
+        conn.close()
+
+        assert exported == 1
+        assert sorted(os.listdir(out_dir)) == ["salidbaanestys.csv", "salidbaanestys.parquet"]
+
+
+@pytest.mark.unit
+class TestMultipleFormats:
+    """Tests for exporting one table to several formats."""
+
+    def test_parse_formats(self):
+        """Test parsing a comma-separated format list."""
+        assert parse_formats("csv") == ["csv"]
+        assert parse_formats("CSV, parquet,csv") == ["csv", "parquet"]
+
+    def test_parse_formats_invalid(self):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_formats("csv,xml")
+
+    def test_export_formats(self, sample_db_file, tmp_path):
+        """Test that each format is written in parallel from the shared connection."""
+        conn = duckdb.connect(sample_db_file, read_only=True)
+        out_dir = tmp_path / "out"
+
+        exported = export_formats(
+            sample_db_file,
+            conn,
+            ["csv", "json", "parquet"],
+            table_name="salidbaanestys",
+            output_dir=str(out_dir),
+        )
+        conn.close()
+
+        assert exported == 3
+        assert pq.read_table(str(out_dir / "salidbaanestys.parquet")).num_rows == 25
+        with open(out_dir / "salidbaanestys.json", encoding="utf-8") as f:
+            assert len(json.load(f)) == 25
+        with open(out_dir / "salidbaanestys.csv", newline="", encoding="utf-8") as f:
+            assert len(list(csv.DictReader(f))) == 25
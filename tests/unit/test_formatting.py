@@ -3,62 +3,61 @@ Unit tests for formatting and display functions
 """
 
 import pytest
-from unittest.mock import patch
 
 # Import the functions to test
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from main import format_text, Colors, Emoji
 
 
+# format_text cases by name: the arguments, the use_colors setting, and the
+# substrings that must and must not appear in the output
+EXPECT = {
+    "color": (
+        ("Test", Colors.GREEN), {}, True,
+        (Colors.GREEN, Colors.RESET, "Test"), (),
+    ),
+    "emoji": (
+        ("Test",), {"emoji": Emoji.CHECK}, True,
+        (Emoji.CHECK, "Test"), (),
+    ),
+    "color_and_emoji": (
+        ("Test", Colors.GREEN, Emoji.CHECK), {}, True,
+        (Colors.GREEN, Colors.RESET, Emoji.CHECK, "Test"), (),
+    ),
+    "bold": (
+        ("Test",), {"bold": True}, True,
+        (Colors.BOLD, Colors.RESET, "Test"), (),
+    ),
+    "colors_disabled": (
+        ("Test", Colors.GREEN, Emoji.CHECK), {"bold": True}, False,
+        ("Test",), (Colors.GREEN, Colors.BOLD, Colors.RESET, Emoji.CHECK),
+    ),
+}
+
+
 @pytest.mark.unit
 class TestFormatting:
     """Tests for formatting and display functions."""
-    
-    def test_format_text_with_color(self):
-        """Test format_text with color."""
-        # Global use_colors is True by default
-        with patch('main.use_colors', True):
-            result = format_text("Test", Colors.GREEN)
-            assert Colors.GREEN in result
-            assert Colors.RESET in result
-            assert "Test" in result
-    
-    def test_format_text_with_emoji(self):
-        """Test format_text with emoji."""
-        # Global use_colors is True by default
-        with patch('main.use_colors', True):
-            result = format_text("Test", emoji=Emoji.CHECK)
-            assert Emoji.CHECK in result
-            assert "Test" in result
-    
-    def test_format_text_with_color_and_emoji(self):
-        """Test format_text with color and emoji."""
-        # Global use_colors is True by default
-        with patch('main.use_colors', True):
-            result = format_text("Test", Colors.GREEN, Emoji.CHECK)
-            assert Colors.GREEN in result
-            assert Colors.RESET in result
-            assert Emoji.CHECK in result
-            assert "Test" in result
-    
-    def test_format_text_with_bold(self):
-        """Test format_text with bold."""
-        # Global use_colors is True by default
-        with patch('main.use_colors', True):
-            result = format_text("Test", bold=True)
-            assert Colors.BOLD in result
-            assert Colors.RESET in result
-            assert "Test" in result
-    
-    def test_format_text_with_colors_disabled(self):
-        """Test format_text with colors disabled."""
-        # Set global use_colors to False
-        with patch('main.use_colors', False):
-            result = format_text("Test", Colors.GREEN, Emoji.CHECK, bold=True)
-            assert Colors.GREEN not in result
-            assert Colors.BOLD not in result
-            assert Colors.RESET not in result
-            assert Emoji.CHECK not in result
-            assert result == "Test"
\ No newline at end of file
+
+    @pytest.mark.parametrize(
+        "args, kwargs, use_colors, expected, forbidden",
+        [pytest.param(*case, id=name) for name, case in EXPECT.items()],
+    )
+    def test_format_text(self, monkeypatch, args, kwargs, use_colors, expected, forbidden):
+        """Test format_text with colors, emoji and bold, and with colors disabled."""
+        monkeypatch.setattr("main.use_colors", use_colors)
+        result = format_text(*args, **kwargs)
+
+        assert all(part in result for part in expected)
+        assert not any(part in result for part in forbidden)
+        # Without colors the text comes back untouched
+        if not use_colors:
+            assert result == "Test"
+
+    def test_format_text_cache_follows_use_colors(self, monkeypatch):
+        """Test that cached styled strings aren't returned once colors are turned off."""
+        monkeypatch.setattr("main.use_colors", True)
+        styled = format_text("Cached", Colors.GREEN, Emoji.CHECK)
+        assert format_text("Cached", Colors.GREEN, Emoji.CHECK) is styled
+
+        monkeypatch.setattr("main.use_colors", False)
+        assert format_text("Cached", Colors.GREEN, Emoji.CHECK) == "Cached"
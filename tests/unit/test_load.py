@@ -0,0 +1,72 @@
+"""
+Unit tests for loading tables into DuckDB with main()
+"""
+
+import pytest
+import duckdb
+import sys
+from unittest.mock import patch
+
+# Import the functions to test
+import main
+
+
+# Rows each mocked table returns, by table name
+TABLE_ROWS = {
+    "SaliDBAanestys": 5,
+    "HETiedot": 3,
+}
+
+
+@pytest.fixture
+def mocked_tables(fast_mock_requests, sample_table_data_last_page, monkeypatch, tmp_path):
+    """Serve the tables in TABLE_ROWS from the mocked API and keep dlt's state in tmp_path."""
+    responses = {}
+    for table, row_count in TABLE_ROWS.items():
+        responses[f'/tables/{table}/rows'] = ({
+            **sample_table_data_last_page,
+            'tableName': table,
+            'rowCount': row_count,
+            'rowData': sample_table_data_last_page['rowData'][:row_count],
+        }, 200)
+    counts = [{"tableName": table, "rowCount": rows} for table, rows in TABLE_ROWS.items()]
+    responses['/tables/counts'] = (counts, 200)
+    # Added last, so the more specific table URLs above are matched first
+    responses['/tables/'] = (list(TABLE_ROWS), 200)
+    fast_mock_requests.add_responses(responses)
+
+    monkeypatch.setenv("DLT_DATA_DIR", str(tmp_path / "dlt"))
+    return fast_mock_requests
+
+
+@pytest.mark.unit
+class TestLoadTables:
+    """Tests for downloading tables and verifying them against the API row counts."""
+
+    def run_main(self, monkeypatch, db_file):
+        """Run main() for every table in TABLE_ROWS."""
+        monkeypatch.setattr(sys, 'argv', [
+            'main.py', '--tables', *TABLE_ROWS, '--db-file', db_file,
+            '--no-progress', '--no-color', '--rate-limit', '1000',
+        ])
+        with patch.dict('main.table_api_row_counts', clear=True), \
+                patch.dict('main.table_page_counts', clear=True):
+            main.main()
+
+    def test_tables_keep_their_rows_across_runs(self, mocked_tables, monkeypatch, tmp_path, capsys):
+        """Test that loading one table doesn't replace another, in the first run or the next."""
+        db_file = str(tmp_path / "eduskunta.duckdb")
+
+        for _ in range(2):
+            self.run_main(monkeypatch, db_file)
+
+            output = capsys.readouterr().out
+            assert "All tables verified" in output
+            with duckdb.connect(db_file) as conn:
+                counts = {
+                    table: conn.execute(
+                        f"SELECT COUNT(*) FROM parliament_data.{table.lower()}"
+                    ).fetchone()[0]
+                    for table in TABLE_ROWS
+                }
+            assert counts == TABLE_ROWS
@@ -3,18 +3,41 @@ Unit tests for the RateLimiter class
 """
 
 import pytest
-import time
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 # Import the class to test
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from main import RateLimiter
 
 
+class FakeClock:
+    """Monotonic clock for the limiter that only moves when told to or slept on."""
+    
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+    
+    def shift(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock():
+    """Run the limiter on a FakeClock, so no test waits for real."""
+    clock = FakeClock()
+    with patch('main.time.monotonic', side_effect=clock.monotonic), \
+            patch('main.time.sleep', side_effect=clock.sleep):
+        yield clock
+
+
 class TestRateLimiterSimple:
-    """Simple tests for RateLimiter that don't mock system calls."""
+    """Simple tests for RateLimiter that don't wait for real time."""
     
     def test_init(self):
         """Test RateLimiter initialization."""
@@ -24,79 +47,74 @@ class TestRateLimiterSimple:
         assert limiter.rate_limit == rate_limit
         assert limiter.tokens == rate_limit
     
-    def test_refill_calculation(self):
-        """Test the token refill calculation directly."""
+    def test_refill_calculation(self, fake_clock):
+        """Test that tokens are refilled for the time passed, up to the limit."""
         rate_limit = 10.0
         limiter = RateLimiter(rate_limit)
-        
-        # Set up initial state
         limiter.tokens = 2.0
-        current_time = time.time()
-        limiter.last_update = current_time - 0.5  # 0.5 seconds ago
-        
-        # Call a method that calculates token refill
-        # For this test, we'll use a helper method instead of acquire to avoid sleep
-        tokens_before = limiter.tokens
         
-        # Calculate how many tokens should be added (0.5 seconds * 10 tokens/sec = 5 tokens)
-        expected_new_tokens = min(rate_limit, tokens_before + 0.5 * rate_limit)
+        # 0.5 seconds * 10 tokens/sec = 5 tokens, minus the one acquired
+        fake_clock.shift(0.5)
+        limiter.acquire()
+        assert limiter.tokens == pytest.approx(6.0)
+        assert fake_clock.sleeps == []
         
-        # Save the last_update time and update it manually
-        last_update_before = limiter.last_update
-        limiter.last_update = current_time
+        # A long idle period doesn't fill the bucket past the limit
+        fake_clock.shift(60.0)
+        limiter.acquire()
+        assert limiter.tokens == pytest.approx(rate_limit - 1.0)
         
-        # Verify the expected calculation matches what happens in the real code
-        # First, manually calculate what should happen in the acquire method
-        time_passed = current_time - last_update_before
-        tokens_added = time_passed * rate_limit
-        expected_tokens = min(rate_limit, tokens_before + tokens_added)
+    def test_token_consumption(self, fake_clock):
+        """Test that tokens are consumed appropriately."""
+        rate_limit = 5.0
+        limiter = RateLimiter(rate_limit)
         
-        # The actual token count will be calculated next time acquire is called
-        # But we'll simulate it here
-        next_tokens = min(rate_limit, limiter.tokens + (current_time - limiter.last_update) * rate_limit)
+        # Test with sufficient tokens (3.0)
+        limiter.tokens = 3.0
+        limiter.acquire()
+        assert fake_clock.sleeps == []
+        assert limiter.tokens == pytest.approx(2.0)  # 3.0 - 1.0 consumed
         
-        # Assert that our calculation matches the expected behavior
-        assert pytest.approx(expected_new_tokens) == expected_tokens
+        # Test with insufficient tokens (0.5)
+        limiter.tokens = 0.5
+        limiter.acquire()
+        assert fake_clock.sleeps == [pytest.approx((1.0 - 0.5) / rate_limit)]  # sleep for 0.1
+        assert limiter.tokens == pytest.approx(-0.5)  # The waited-for half token is owed
         
-    def test_token_consumption(self):
-        """Test that tokens are consumed appropriately."""
+        # After the sleep the bucket has paid off its debt
+        limiter.acquire()
+        assert fake_clock.sleeps[-1] == pytest.approx(1.0 / rate_limit)
+    
+    def test_acquire_reserves_slots_without_holding_lock(self):
+        """Test that empty-bucket callers wait for consecutive slots outside the lock."""
         rate_limit = 5.0
         limiter = RateLimiter(rate_limit)
+        limiter.tokens = 0.0
         
-        # Manually set tokens to a known value to avoid time-dependent behavior
-        limiter.tokens = 3.0
+        sleeps = []
+        def fake_sleep(seconds):
+            # Another thread must be able to take the lock while this one waits
+            assert not limiter.lock.locked()
+            sleeps.append(seconds)
         
-        # Create a subclass to override sleep so we can test token consumption
-        # without actually sleeping
-        class NoSleepRateLimiter(RateLimiter):
-            def __init__(self, limiter):
-                # Take properties from the existing limiter
-                self.rate_limit = limiter.rate_limit
-                self.tokens = limiter.tokens
-                self.last_update = limiter.last_update
-                self.lock = limiter.lock
-                
-            # Override sleep to do nothing
-            def _sleep_if_needed(self, tokens_before_update):
-                if tokens_before_update < 1.0:
-                    # Calculate how much we would sleep, but don't actually sleep
-                    sleep_time = (1.0 - tokens_before_update) / self.rate_limit
-                    # Just update the tokens as if we slept
-                    self.tokens = 0.0
-                    return sleep_time
-                else:
-                    # Consume one token
-                    self.tokens -= 1.0
-                    return 0.0
+        with patch('main.time.monotonic', return_value=limiter.last_update), \
+                patch('main.time.sleep', side_effect=fake_sleep):
+            limiter.acquire()
+            limiter.acquire()
         
-        # Test with sufficient tokens (3.0)
-        no_sleep_limiter = NoSleepRateLimiter(limiter)
-        sleep_time = no_sleep_limiter._sleep_if_needed(no_sleep_limiter.tokens)
-        assert sleep_time == 0.0
-        assert no_sleep_limiter.tokens == 2.0  # 3.0 - 1.0 consumed
+        assert sleeps == [pytest.approx(1 / rate_limit), pytest.approx(2 / rate_limit)]
+        assert limiter.tokens == pytest.approx(-2.0)
+    
+    def test_pause_delays_next_acquire(self):
+        """Test that pause makes the next caller wait out the pause."""
+        rate_limit = 5.0
+        limiter = RateLimiter(rate_limit)
         
-        # Test with insufficient tokens (0.5)
-        no_sleep_limiter.tokens = 0.5
-        sleep_time = no_sleep_limiter._sleep_if_needed(no_sleep_limiter.tokens)
-        assert pytest.approx(sleep_time) == (1.0 - 0.5) / rate_limit  # sleep for (1.0 - 0.5) / 5.0 = 0.1
-        assert no_sleep_limiter.tokens == 0.0  # Tokens reset to 0
\ No newline at end of file
+        sleeps = []
+        with patch('main.time.monotonic', return_value=limiter.last_update), \
+                patch('main.time.sleep', side_effect=sleeps.append):
+            limiter.pause(2.0)
+            limiter.acquire()
+        
+        # 2 seconds of pause plus the slot of the token itself
+        assert sleeps == [pytest.approx(2.0 + 1 / rate_limit)]
@@ -2,16 +2,30 @@
 Unit tests for the eduskunta_table resource function
 """
 
+import time
 import pytest
 from unittest.mock import patch, MagicMock, call
 
 # Import the functions to test
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import main
 from main import eduskunta_table, PER_PAGE
 
 
+@pytest.fixture
+def preloaded_table_mocks(fast_mock_requests, sample_table_data_last_page):
+    """
+    Register a single-page TestTable with the 5 sample rows.
+
+    Tests that need a bigger table register their own responses on top,
+    which replace these ones.
+    """
+    fast_mock_requests.add_responses({
+        '/tables/TestTable/rows': ({**sample_table_data_last_page, 'rowCount': 5}, 200),
+        '/tables/counts': ([{"tableName": "TestTable", "rowCount": 5}], 200),
+    })
+    return fast_mock_requests
+
+
 @pytest.mark.unit
 class TestEduskuntaTableResource:
     """Tests for the eduskunta_table resource function."""
@@ -31,26 +45,18 @@ class TestEduskuntaTableResource:
         # We can verify in the codebase that @dlt.resource(name="eduskunta_table", write_disposition="replace")
         # is properly set, but cannot rely on a version-independent way to test for attributes
     
-    def test_single_page_data(self, mock_requests, sample_table_data):
+    def test_single_page_data(self, preloaded_table_mocks):
         """Test retrieving data when there's only a single page."""
-        # Setup mock to return a single page with hasMore=False
-        sample_data = sample_table_data.copy()
-        sample_data['hasMore'] = False
-        mock_requests.add_response('/tables/TestTable/rows', sample_data)
-        
-        # Mock row counts
-        mock_requests.add_response('/tables/counts', [
-            {"tableName": "TestTable", "rowCount": 5}
-        ])
-        
         # Create a generator from the resource function
         generator = eduskunta_table(table_name="TestTable", show_progress=False)
         
-        # Collect all data from the generator
-        data = list(generator)
+        # Take the first row and count the rest without collecting them
+        rows = iter(generator)
+        first_row = next(rows)
+        remaining = sum(1 for _ in rows)
         
         # Verify the data is correctly converted and yielded
-        assert len(data) == 5  # 5 rows in the sample data
+        assert 1 + remaining == 5  # 5 rows in the sample data
         
         # Verify the first row matches expected format
         expected_first_row = {
@@ -60,20 +66,16 @@ class TestEduskuntaTableResource:
             "Aanestystapa": "Manual",
             "Pvm": "2023-01-01"
         }
-        assert data[0] == expected_first_row
+        assert first_row == expected_first_row
     
     @patch('main.rate_limiter')
-    def test_row_limit(self, mock_rate_limiter, mock_requests, sample_table_data):
+    def test_row_limit(self, mock_rate_limiter, preloaded_table_mocks, sample_table_data_has_more):
         """Test that row_limit is respected."""
-        # Setup mock to return a single page with hasMore=True
-        sample_data = sample_table_data.copy()
-        sample_data['hasMore'] = True
-        mock_requests.add_response('/tables/TestTable/rows', sample_data)
-        
-        # Mock row counts
-        mock_requests.add_response('/tables/counts', [
-            {"tableName": "TestTable", "rowCount": 100}
-        ])
+        # Same page as the preloaded one, but with more pages available
+        preloaded_table_mocks.add_responses({
+            '/tables/TestTable/rows': (sample_table_data_has_more, 200),
+            '/tables/counts': ([{"tableName": "TestTable", "rowCount": 100}], 200),
+        })
         
         # Set row_limit lower than the number of rows in the response
         row_limit = 3
@@ -85,21 +87,15 @@ class TestEduskuntaTableResource:
             row_limit=row_limit
         )
         
-        # Collect all data from the generator
-        data = list(generator)
+        # Count the rows from the generator
+        count = sum(1 for _ in generator)
         
         # Verify the data is limited by the row_limit
-        assert len(data) == row_limit
+        assert count == row_limit
     
     @patch('main.print')  # Mock print to avoid console output during tests
-    def test_show_progress_flag(self, mock_print, mock_requests, sample_table_data):
+    def test_show_progress_flag(self, mock_print, preloaded_table_mocks):
         """Test that show_progress flag controls progress display."""
-        # Setup mock
-        mock_requests.add_response('/tables/TestTable/rows', sample_table_data)
-        mock_requests.add_response('/tables/counts', [
-            {"tableName": "TestTable", "rowCount": 5}
-        ])
-        
         # With show_progress=False
         generator = eduskunta_table(table_name="TestTable", show_progress=False)
         list(generator)  # Consume the generator
@@ -110,4 +106,115 @@ class TestEduskuntaTableResource:
             call for call in mock_print.call_args_list 
             if "Downloaded" in str(call) and "pages" in str(call)
         ]
-        assert len(progress_calls) <= 1  # Should only be called once for final message, not for progress updates
\ No newline at end of file
+        assert len(progress_calls) <= 1  # Should only be called once for final message, not for progress updates
+    
+    @patch('main.rate_limiter', None)
+    def test_row_limit_across_pages(self, fast_mock_requests, sample_table_data_has_more):
+        """Test that row_limit trims the page where the limit is reached."""
+        # Every page is a full page of the 5 sample rows repeated, with more pages available
+        full_page = {**sample_table_data_has_more, 'rowData': sample_table_data_has_more['rowData'] * (PER_PAGE // 5)}
+        fast_mock_requests.add_responses({
+            '/tables/TestTable/rows': (full_page, 200),
+            '/tables/counts': ([{"tableName": "TestTable", "rowCount": 3 * PER_PAGE}], 200),
+        })
+        
+        generator = eduskunta_table(table_name="TestTable", show_progress=False, row_limit=PER_PAGE + 2)
+        data = list(generator)
+        
+        # All of page 0 and 2 rows from page 1, yielded as single rows
+        assert len(data) == PER_PAGE + 2
+        assert [row["AanestysId"] for row in data[-7:]] == [1, 2, 3, 4, 5, 1, 2]
+    
+    @patch('main.rate_limiter', None)
+    def test_row_limit_requests_only_needed_pages(self, fast_mock_requests, sample_table_data_has_more):
+        """Test that pages past the row limit are never requested."""
+        fast_mock_requests.add_responses({
+            '/tables/counts': ([{"tableName": "TestTable", "rowCount": 10 * PER_PAGE}], 200),
+        })
+        requested = []
+        
+        def fetch_page(table_name, page, per_page):
+            requested.append(page)
+            return page, {
+                "columnNames": sample_table_data_has_more["columnNames"],
+                "rowData": [[page, i, "Item", "Manual", "2023-01-01"] for i in range(per_page)],
+            }
+        
+        with patch('main.fetch_page_with_retry', side_effect=fetch_page):
+            data = list(eduskunta_table(
+                table_name="TestTable", show_progress=False, max_concurrent_requests=3, row_limit=PER_PAGE + 1,
+            ))
+        
+        assert len(data) == PER_PAGE + 1
+        assert sorted(requested) == [0, 1]
+    
+    @patch('main.rate_limiter', None)
+    def test_pages_yielded_in_order(self, fast_mock_requests, sample_table_data_has_more):
+        """Test that pages are yielded in page order even when they finish out of order."""
+        fast_mock_requests.add_responses({
+            '/tables/TestTable/rows': (sample_table_data_has_more, 200),
+            '/tables/counts': ([{"tableName": "TestTable", "rowCount": 6 * PER_PAGE}], 200),
+        })
+        
+        def fetch_page(table_name, page, per_page):
+            # Later pages come back sooner than earlier ones
+            time.sleep(0.01 * (6 - page))
+            return page, {
+                "columnNames": sample_table_data_has_more["columnNames"],
+                "rowData": [[page, 0, "Item", "Manual", "2023-01-01"]],
+            }
+        
+        with patch('main.fetch_page_with_retry', side_effect=fetch_page):
+            data = list(eduskunta_table(table_name="TestTable", show_progress=False, max_concurrent_requests=3))
+        
+        page_ids = [row["AanestysId"] for row in data]
+        assert page_ids == [0, 1, 2, 3, 4, 5]
+    
+    @patch('main.rate_limiter', None)
+    def test_unknown_row_count_fetches_first_page_alone(self, fast_mock_requests, sample_table_data_has_more):
+        """Test that the table size is read from page 0 when the row counts are unavailable."""
+        sample_data = {**sample_table_data_has_more, 'rowCount': 2 * PER_PAGE}
+        fast_mock_requests.add_responses({
+            '/tables/TestTable/rows': (sample_data, 200),
+            '/tables/counts': ([], 200),
+        })
+        
+        data = list(eduskunta_table(table_name="TestTable", show_progress=False))
+        
+        # Page 0 and page 1, each with the 5 sample rows
+        assert len(data) == 10
+        assert data[0]["KohtaOtsikko"] == "Test item 1"
+    
+    @patch('main.rate_limiter', None)
+    def test_records_api_row_count(self, preloaded_table_mocks):
+        """Test that the API row count is kept for verifying the load."""
+        with patch.dict('main.table_api_row_counts', clear=True):
+            list(eduskunta_table(table_name="TestTable", show_progress=False))
+            assert main.table_api_row_counts == {"TestTable": 5}
+    
+    @patch('main.rate_limiter', None)
+    def test_disagreeing_row_counts_keep_the_larger(self, fast_mock_requests, sample_table_data_last_page, capsys):
+        """Test that page 0's row count is checked against the counts endpoint when fetched concurrently."""
+        fast_mock_requests.add_responses({
+            '/tables/TestTable/rows': ({**sample_table_data_last_page, 'rowCount': 7}, 200),
+            '/tables/counts': ([{"tableName": "TestTable", "rowCount": 5}], 200),
+        })
+        
+        with patch.dict('main.table_api_row_counts', clear=True):
+            list(eduskunta_table(table_name="TestTable", show_progress=False))
+            assert main.table_api_row_counts == {"TestTable": 7}
+        
+        assert "API reported both 5 and 7 rows" in capsys.readouterr().out
+    
+    @patch('main.rate_limiter', None)
+    def test_no_row_count_anywhere_stops_after_first_page(self, fast_mock_requests, sample_table_data_has_more):
+        """Test that a table without any row count is downloaded as its first page only."""
+        sample_data = {key: value for key, value in sample_table_data_has_more.items() if key != 'rowCount'}
+        fast_mock_requests.add_responses({
+            '/tables/TestTable/rows': (sample_data, 200),
+            '/tables/counts': ([], 200),
+        })
+        
+        data = list(eduskunta_table(table_name="TestTable", show_progress=False))
+        
+        assert len(data) == 5
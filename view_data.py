@@ -9,8 +9,8 @@ import sys
 def main():
     db_file = sys.argv[1] if len(sys.argv) > 1 else "eduskunta.duckdb"
     
-    # Connect to the database
-    conn = duckdb.connect(db_file)
+    # Connect to the database read-only; this script never writes
+    conn = duckdb.connect(db_file, read_only=True)
     
     # List all tables
     tables = conn.execute("""